@@ -1,10 +1,26 @@
 #!/usr/bin/python3
 """Init file for views module"""
 
-from flask import Blueprint
+from flask import Blueprint, abort, jsonify, make_response, request
 
 app_views = Blueprint('app_views', __name__, url_prefix='/api/v1')
 
+
+def page_args():
+    """returns the limit and after query parameters of a collection
+    request, None when missing. Answers 400 if limit is not a positive
+    integer"""
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            abort(make_response(jsonify({'error': 'Invalid limit'}), 400))
+    return limit, request.args.get('after')
+
+
 from api.v1.views.index import *
 from api.v1.views.states import *
 from api.v1.views.cities import *
@@ -13,3 +29,5 @@ from api.v1.views.users import *
 from api.v1.views.places import *
 from api.v1.views.places_reviews import *
 from api.v1.views.places_amenities import *
+from api.v1.views.batch import *
+from api.v1.views.autocomplete import *
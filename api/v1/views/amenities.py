@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Amenities view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.amenity import Amenity
 from models import storage
@@ -15,6 +15,19 @@ def get_all_amenities():
     ---
     tags:
       - Amenities
+    parameters:
+      - name: limit
+        description: Maximum number of amenities returned, by id order
+        in: query
+        type: integer
+        required: false
+        example: 100
+      - name: after
+        description: Only returns the amenities with an id after this one,
+                     the id of the last one of the previous page
+        in: query
+        type: string
+        required: false
     responses:
       200:
         description: All amenities from the database
@@ -56,7 +69,11 @@ def get_all_amenities():
               }
             ]
     """
-    amenities = storage.all(Amenity).values()
+    limit, after = page_args()
+    if limit is None and after is None:
+        amenities = storage.all(Amenity).values()
+    else:
+        amenities = storage.page(Amenity, limit, after)
     return jsonify([amenity.to_dict() for amenity in amenities]), 200
 
 
@@ -265,10 +282,11 @@ def update_amenity(amenity_id):
     amenity = storage.get(Amenity, amenity_id)
     if not amenity:
         abort(404)
-    for key, val in amenity_json.items():
-        if key not in ['id', 'created_at', 'updated_at']:
-            setattr(amenity, key, val)
-    amenity.save()
+    with storage.transaction():
+        for key, val in amenity_json.items():
+            if key not in ['id', 'created_at', 'updated_at']:
+                setattr(amenity, key, val)
+        amenity.save()
     return jsonify(amenity.to_dict()), 200
 
 
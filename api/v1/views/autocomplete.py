@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""Autocomplete view for api v1"""
+
+from api.v1.views import app_views, page_args
+from flask import jsonify, request
+from models.city import City
+from models.state import State
+from models import storage
+
+# classes whose names are completed, in the order of their equal names
+classes = (State, City)
+
+
+@app_views.route('/autocomplete',
+                 strict_slashes=False, methods=['GET'])
+def autocomplete():
+    """
+    Get the states and cities whose name starts with a prefix
+    ---
+    tags:
+      - Autocomplete
+    parameters:
+      - name: prefix
+        description: Start of the names, case is ignored
+        in: query
+        type: string
+        required: true
+        example: "Ca"
+      - name: limit
+        description: Maximum number of states and cities returned
+        in: query
+        type: integer
+        required: false
+        default: 10
+    responses:
+      400:
+        description: Missing prefix or invalid limit
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              default: "Missing prefix"
+              example: "Invalid limit"
+      200:
+        description: The states and cities by name order, then the states
+                     first, then by id order
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              __class__:
+                type: string
+                description: The object's class, State or City
+              created_at:
+                type: string
+                description: Creation date (YY-mm-ddTHH:mm.ffffff)
+              id:
+                type: string
+                description: State's or city's uuid4
+              name:
+                type: string
+                description: State's or city's name
+              state_id:
+                type: string
+                description: uuid4 of the state of a city
+              updated_at:
+                type: string
+                description: Update date (YY-mm-ddTHH:mm.ffffff)
+          example:
+            [
+              {
+                "__class__": "State",
+                "created_at": "2017-03-25T02:17:06.000000",
+                "id": "421a55f4-7d82-47d9-b51c-a76916479545",
+                "name": "California",
+                "updated_at": "2017-03-25T02:17:06.000000"
+              },
+              {
+                "__class__": "City",
+                "created_at": "2017-03-25T02:17:06.000000",
+                "id": "c3b2a6b4-9f16-4fe6-8e26-6e1e6e2a0f43",
+                "name": "Calera",
+                "state_id": "0e391e25-dd3a-45f4-bce3-4d1dea83f3c7",
+                "updated_at": "2017-03-25T02:17:06.000000"
+              }
+            ]
+    """
+    prefix = request.args.get('prefix')
+    if prefix is None:
+        return jsonify({'error': 'Missing prefix'}), 400
+    limit = page_args()[0]
+    if limit is None:
+        limit = 10
+    objs = [obj for cls in classes
+            for obj in storage.prefix_search(cls, "name", prefix, limit)]
+    objs.sort(key=lambda obj: (str(obj.name).casefold(),
+                               classes.index(obj.__class__), obj.id))
+    return jsonify([obj.to_dict() for obj in objs[:limit]]), 200
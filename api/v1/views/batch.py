@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""Batch view for api v1"""
+
+from api.v1.views import app_views
+from datetime import datetime
+from flask import jsonify, abort, request
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from models import storage
+
+classes = {"State": State, "User": User, "Amenity": Amenity,
+           "City": City, "Place": Place, "Review": Review}
+required = {"State": ("name",), "User": ("email", "password"),
+            "Amenity": ("name",), "City": ("state_id", "name"),
+            "Place": ("city_id", "user_id", "name"),
+            "Review": ("place_id", "user_id", "text")}
+parents = {"state_id": State, "city_id": City, "user_id": User,
+           "place_id": Place}
+
+
+@app_views.route('/batch',
+                 strict_slashes=False, methods=['POST'])
+def create_batch():
+    """
+    Create many objects with a single write to the storage
+    ---
+    tags:
+      - Batch
+    parameters:
+      - name: create_body
+        description: List of the objects to be stored, each with its class
+        in: body
+        type: application/json
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required:
+              - __class__
+            properties:
+              __class__:
+                type: string
+                description: The object's class
+          example:
+            [
+              {
+                "__class__": "State",
+                "id": "0d9148c0-f394-412d-addc-1e5eb4f3e8db",
+                "name": "Wyoming"
+              },
+              {
+                "__class__": "City",
+                "state_id": "0d9148c0-f394-412d-addc-1e5eb4f3e8db",
+                "name": "Cheyenne"
+              }
+            ]
+    responses:
+      400:
+        description: Invalid JSON, unknown class, missing or invalid
+                     attribute, or id already used
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              default: "Not a JSON"
+              example: "Missing name"
+      404:
+        description: An object refers to an object that does not exist
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              default: "Not found"
+              example: "Not found"
+      201:
+        description: Objects created
+        schema:
+          type: array
+          items:
+            type: string
+            description: The uuid4 of a created object, in the order given
+          example:
+            [
+              "0d9148c0-f394-412d-addc-1e5eb4f3e8db",
+              "d2398800-dd87-482b-be21-50a3063858ad"
+            ]
+    """
+    objs_json = request.get_json(silent=True)
+    if not objs_json or type(objs_json) is not list or \
+            not all(type(obj_json) is dict for obj_json in objs_json):
+        return jsonify({'error': 'Not a JSON'}), 400
+    for obj_json in objs_json:
+        if obj_json.get('__class__') not in classes:
+            return jsonify({'error': 'Unknown class'}), 400
+        for attr in required[obj_json['__class__']]:
+            if attr not in obj_json:
+                return jsonify({'error': 'Missing ' + attr}), 400
+            if attr in parents and type(obj_json[attr]) is not str:
+                return jsonify({'error': 'Invalid ' + attr}), 400
+        if 'id' in obj_json and type(obj_json['id']) is not str:
+            return jsonify({'error': 'Invalid id'}), 400
+        for attr in ('created_at', 'updated_at'):
+            if obj_json.get(attr):
+                try:
+                    datetime.fromisoformat(obj_json[attr])
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'Invalid ' + attr}), 400
+    objs = [classes[obj_json['__class__']](**obj_json)
+            for obj_json in objs_json]
+    created = {(obj.__class__, obj.id) for obj in objs}
+    if len(created) != len(objs):
+        return jsonify({'error': 'Duplicate id'}), 400
+    for name, cls in classes.items():
+        ids = [obj_json['id'] for obj_json in objs_json
+               if obj_json['__class__'] == name and 'id' in obj_json]
+        if storage.get_many(cls, ids):
+            return jsonify({'error': 'Duplicate id'}), 400
+    for attr, cls in parents.items():
+        ids = {getattr(obj, attr) for obj in objs
+               if attr in required[obj.__class__.__name__]}
+        ids = [id for id in ids if (cls, id) not in created]
+        if len(storage.get_many(cls, ids)) != len(ids):
+            abort(404)
+    order = list(classes)
+    with storage.transaction():
+        storage.bulk_new(sorted(objs,
+                                key=lambda obj: order.index(
+                                    obj.__class__.__name__)))
+        storage.bulk_save()
+    return jsonify([obj.id for obj in objs]), 201
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Cities view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.state import State
 from models.city import City
@@ -23,6 +23,18 @@ def get_all_cities_from_state(state_id):
         type: string
         required: true
         example: d2398800-dd87-482b-be21-50a3063858ad
+      - name: limit
+        description: Maximum number of cities returned, by id order
+        in: query
+        type: integer
+        required: false
+        example: 100
+      - name: after
+        description: Only returns the cities with an id after this one,
+                     the id of the last one of the previous page
+        in: query
+        type: string
+        required: false
     responses:
       404:
         description: No state found
@@ -81,7 +93,11 @@ def get_all_cities_from_state(state_id):
     state = storage.get(State, state_id)
     if not state:
         abort(404)
-    cities = state.cities
+    limit, after = page_args()
+    if limit is None and after is None:
+        cities = state.cities
+    else:
+        cities = storage.page(City, limit, after, "state_id", state_id)
     return jsonify([city.to_dict() for city in cities]), 200
 
 
@@ -294,10 +310,11 @@ def update_city(city_id):
     city = storage.get(City, city_id)
     if not city:
         abort(404)
-    for key, val in city_json.items():
-        if key not in ['id', 'state_id', 'created_at', 'updated_at']:
-            setattr(city, key, val)
-    city.save()
+    with storage.transaction():
+        for key, val in city_json.items():
+            if key not in ['id', 'state_id', 'created_at', 'updated_at']:
+                setattr(city, key, val)
+        city.save()
     return jsonify(city.to_dict()), 200
 
 
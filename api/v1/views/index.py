@@ -2,7 +2,7 @@
 """Index view for api v1"""
 
 from api.v1.views import app_views
-from flask import jsonify
+from flask import jsonify, abort
 
 
 @app_views.route('/status',
@@ -32,3 +32,14 @@ def stats():
     for key, val in classes.items():
         count[key] = storage.count(val)
     return jsonify(count), 200
+
+
+@app_views.route('/stats/pool',
+                 strict_slashes=False, methods=['GET'])
+def pool_stats():
+    """Returns the database connection pool state and checkout waits"""
+    import models
+
+    if models.storage_t != "db":
+        abort(404)
+    return jsonify(models.storage.pool_stats()), 200
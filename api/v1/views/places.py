@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 """Places view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.city import City
+from models.engine.geo import valid_point
+from models.engine.search import range_attributes, search_places
 from models.place import Place
 from models.user import User
 from models import storage
@@ -24,6 +26,18 @@ def get_all_places_from_city(city_id):
         type: string
         required: true
         example: 1da255c0-f023-4779-8134-2b1b40f87683
+      - name: limit
+        description: Maximum number of places returned, by id order
+        in: query
+        type: integer
+        required: false
+        example: 100
+      - name: after
+        description: Only returns the places with an id after this one,
+                     the id of the last one of the previous page
+        in: query
+        type: string
+        required: false
     responses:
       404:
         description: No city found
@@ -116,10 +130,15 @@ def get_all_places_from_city(city_id):
               }
             ]
     """
-    city = storage.get(City, city_id)
+    limit, after = page_args()
+    paged = limit is not None or after is not None
+    city = storage.get(City, city_id, load=None if paged else ["places"])
     if not city:
         abort(404)
-    places = city.places
+    if not paged:
+        places = city.places
+    else:
+        places = storage.page(Place, limit, after, "city_id", city_id)
     return jsonify([place.to_dict() for place in places]), 200
 
 
@@ -441,10 +460,12 @@ def update_place(place_id):
     place = storage.get(Place, place_id)
     if not place:
         abort(404)
-    for key, val in place_json.items():
-        if key not in ['id', 'user_id', 'city_id', 'created_at', 'updated_at']:
-            setattr(place, key, val)
-    place.save()
+    with storage.transaction():
+        for key, val in place_json.items():
+            if key not in ['id', 'user_id', 'city_id',
+                           'created_at', 'updated_at']:
+                setattr(place, key, val)
+        place.save()
     return jsonify(place.to_dict()), 200
 
 
@@ -522,10 +543,65 @@ def search_place():
               items:
                 type: string
                 description: Amenity id
+            price_by_night:
+              type: object
+              description: Range of the price, each bound being optional.
+                           number_rooms, number_bathrooms and max_guest
+                           take the same ranges
+              properties:
+                min:
+                  type: number
+                  description: Lowest value, included
+                max:
+                  type: number
+                  description: Highest value, included
+            sort:
+              type: string
+              description: Attribute among price_by_night, max_guest,
+                           number_rooms and number_bathrooms the places
+                           are sorted on, descending if prefixed by "-".
+                           By relevance to q, by distance to near, or by
+                           id otherwise
+            limit:
+              type: integer
+              description: Maximum number of places returned
+            bbox:
+              type: object
+              description: Box the places are in, in degrees. west is
+                           greater than east across the antimeridian
+              properties:
+                south:
+                  type: number
+                west:
+                  type: number
+                north:
+                  type: number
+                east:
+                  type: number
+            near:
+              type: object
+              description: Point the places are sorted by the distance to
+              properties:
+                latitude:
+                  type: number
+                longitude:
+                  type: number
+                radius:
+                  type: number
+                  description: Optional greatest distance in kilometers
+            q:
+              type: string
+              description: Keywords the name, the description or the
+                           reviews of the places hold at least one of
           example:
             states: ["9799648d-88dc-4e63-b858-32e6531bec5c"]
             cities: ["05b0b99c-f10e-4e3a-88d1-b3187d6998ee"]
             amenities: ["017ec502-e84a-4a0f-92d6-d97e27bb6bdf"]
+            q: "cozy cottage"
+            price_by_night: {"min": 50, "max": 200}
+            max_guest: {"min": 4}
+            near: {"latitude": 38.3, "longitude": -122.4, "radius": 25}
+            limit: 10
     responses:
       400:
         description: User error
@@ -618,34 +694,55 @@ def search_place():
               },
             ]
     """
-    from models.state import State
     search_json = request.get_json(silent=True)
-    if search_json is None:
+    if type(search_json) is not dict:
         return jsonify({'error': 'Not a JSON'}), 400
-    places = storage.all(Place).values()
 
-    states_param = search_json.get("states")
-    cities_param = search_json.get("cities")
-    amenities_param = search_json.get("amenities")
+    for attr in ("states", "cities", "amenities"):
+        ids = search_json.get(attr)
+        if ids is not None and (type(ids) is not list or
+                                any(type(id) is not str for id in ids)):
+            return jsonify({'error': 'Invalid ' + attr}), 400
+    ranges = {}
+    for attr in range_attributes:
+        if attr not in search_json:
+            continue
+        bounds = search_json[attr]
+        if type(bounds) is not dict or \
+                any(type(bounds.get(bound)) not in (int, float, type(None))
+                    for bound in ("min", "max")):
+            return jsonify({'error': 'Invalid ' + attr}), 400
+        ranges[attr] = (bounds.get("min"), bounds.get("max"))
+    sort = search_json.get("sort")
+    if sort is not None and (type(sort) is not str or (
+            sort[1:] if sort.startswith("-") else sort)
+            not in range_attributes):
+        return jsonify({'error': 'Invalid sort'}), 400
+    limit = search_json.get("limit")
+    if limit is not None and (type(limit) is not int or limit < 1):
+        return jsonify({'error': 'Invalid limit'}), 400
+    box = search_json.get("bbox")
+    if box is not None:
+        if type(box) is not dict or \
+                not valid_point(box.get("south"), box.get("west")) or \
+                not valid_point(box.get("north"), box.get("east")) or \
+                box["south"] > box["north"]:
+            return jsonify({'error': 'Invalid bbox'}), 400
+        box = (box["south"], box["west"], box["north"], box["east"])
+    near = search_json.get("near")
+    if near is not None:
+        if type(near) is not dict or \
+                not valid_point(near.get("latitude"), near.get("longitude")) \
+                or type(near.get("radius")) not in (int, float, type(None)) \
+                or (near.get("radius") or 0) < 0:
+            return jsonify({'error': 'Invalid near'}), 400
+        near = (near["latitude"], near["longitude"], near.get("radius"))
+    q = search_json.get("q")
+    if q is not None and type(q) is not str:
+        return jsonify({'error': 'Invalid q'}), 400
 
-    places_search = []
-    if states_param:
-        for state_id in states_param:
-            state = storage.get(State, state_id)
-            places_search.extend(
-                [place for city in state.cities for place in city.places])
-    if cities_param:
-        for city_id in cities_param:
-            city = storage.get(City, city_id)
-            places_search.extend(
-                [place for place in city.places if place not in places_search])
-    places_search = places_search if places_search else places
-    if amenities_param:
-        place_amenity_filter = []
-        for place in places_search:
-            amenity_list = [amenity.id for amenity in place.amenities]
-            if all(amenity_id in amenity_list for amenity_id
-                    in amenities_param):
-                place_amenity_filter.append(place)
-        places_search = place_amenity_filter
+    places_search = search_places(search_json.get("states"),
+                                  search_json.get("cities"),
+                                  search_json.get("amenities"),
+                                  ranges, sort, limit, box, near, q)
     return jsonify([place.to_dict() for place in places_search]), 200
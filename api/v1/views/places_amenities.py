@@ -15,13 +15,7 @@ def get_all_amenities_from_place(place_id):
     place = models.storage.get(Place, place_id)
     if not place:
         abort(404)
-    if models.storage_t == "db":
-        amenities = place.amenities
-    else:
-        amenity_ids = [place.amenity_ids] \
-            if type(place.amenity_ids) is str else place.amenity_ids
-        amenities = [models.storage.get(Amenity, amenity_id)
-                     for amenity_id in amenity_ids]
+    amenities = place.amenities
     return jsonify([amenity.to_dict() for amenity in amenities]), 200
 
 
@@ -35,15 +29,16 @@ def create_link_place_amenity(place_id, amenity_id):
     amenity = models.storage.get(Amenity, amenity_id)
     if not amenity:
         abort(404)
-    if models.storage_t == "db":
-        if amenity in place.amenities:
-            return jsonify(amenity.to_dict()), 200
-        place.amenities.append(amenity)
-    else:
-        if amenity_id in place.amenity_ids:
-            return jsonify(amenity.to_dict()), 200
-        place.amenity_ids.append(amenity_id)
-    models.storage.save()
+    with models.storage.transaction():
+        if models.storage_t == "db":
+            if amenity in place.amenities:
+                return jsonify(amenity.to_dict()), 200
+            place.amenities.append(amenity)
+        else:
+            if amenity_id in place.amenity_ids:
+                return jsonify(amenity.to_dict()), 200
+            place.amenity_ids = place.amenity_ids + [amenity_id]
+        models.storage.save()
     return jsonify(amenity.to_dict()), 201
 
 
@@ -58,13 +53,16 @@ def delete_link_place_amenity(place_id, amenity_id):
     amenity = models.storage.get(Amenity, amenity_id)
     if not amenity:
         abort(404)
-    if models.storage_t == "db":
-        if amenity not in place.amenities:
-            abort(404)
-        place.amenities.remove(amenity)
-    else:
-        if amenity_id not in place.amenity_ids:
-            abort(404)
-        place.amenity_ids.remove(amenity_id)
-    models.storage.save()
+    with models.storage.transaction():
+        if models.storage_t == "db":
+            if amenity not in place.amenities:
+                abort(404)
+            place.amenities.remove(amenity)
+        else:
+            if amenity_id not in place.amenity_ids:
+                abort(404)
+            place.amenity_ids = [place_amenity_id for place_amenity_id
+                                 in place.amenity_ids
+                                 if place_amenity_id != amenity_id]
+        models.storage.save()
     return jsonify({}), 200
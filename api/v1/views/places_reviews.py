@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Places-Reviews view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.place import Place
 from models.review import Review
@@ -16,7 +16,11 @@ def get_all_reviews_from_place(place_id):
     place = storage.get(Place, place_id)
     if not place:
         abort(404)
-    reviews = place.reviews
+    limit, after = page_args()
+    if limit is None and after is None:
+        reviews = place.reviews
+    else:
+        reviews = storage.page(Review, limit, after, "place_id", place_id)
     return jsonify([review.to_dict() for review in reviews]), 200
 
 
@@ -63,11 +67,12 @@ def update_review(review_id):
     review = storage.get(Review, review_id)
     if not review:
         abort(404)
-    for key, val in review_json.items():
-        if key not in ['id', 'user_id', 'place_id',
-                       'created_at', 'updated_at']:
-            setattr(review, key, val)
-    review.save()
+    with storage.transaction():
+        for key, val in review_json.items():
+            if key not in ['id', 'user_id', 'place_id',
+                           'created_at', 'updated_at']:
+                setattr(review, key, val)
+        review.save()
     return jsonify(review.to_dict()), 200
 
 
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """States view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.state import State
 from models import storage
@@ -15,6 +15,19 @@ def get_all_states():
     ---
     tags:
       - States
+    parameters:
+      - name: limit
+        description: Maximum number of states returned, by id order
+        in: query
+        type: integer
+        required: false
+        example: 100
+      - name: after
+        description: Only returns the states with an id after this one,
+                     the id of the last one of the previous page
+        in: query
+        type: string
+        required: false
     responses:
       200:
         description: All states from the database
@@ -56,7 +69,11 @@ def get_all_states():
               }
             ]
     """
-    states = storage.all(State).values()
+    limit, after = page_args()
+    if limit is None and after is None:
+        states = storage.all(State).values()
+    else:
+        states = storage.page(State, limit, after)
     return jsonify([state.to_dict() for state in states]), 200
 
 
@@ -265,10 +282,11 @@ def update_state(state_id):
     state = storage.get(State, state_id)
     if not state:
         abort(404)
-    for key, val in state_json.items():
-        if key not in ['id', 'created_at', 'updated_at']:
-            setattr(state, key, val)
-    state.save()
+    with storage.transaction():
+        for key, val in state_json.items():
+            if key not in ['id', 'created_at', 'updated_at']:
+                setattr(state, key, val)
+        state.save()
     return jsonify(state.to_dict()), 200
 
 
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Users view for api v1"""
 
-from api.v1.views import app_views
+from api.v1.views import app_views, page_args
 from flask import jsonify, abort, request
 from models.user import User
 from models import storage
@@ -15,6 +15,19 @@ def get_all_users():
     ---
     tags:
       - Users
+    parameters:
+      - name: limit
+        description: Maximum number of users returned, by id order
+        in: query
+        type: integer
+        required: false
+        example: 100
+      - name: after
+        description: Only returns the users with an id after this one,
+                     the id of the last one of the previous page
+        in: query
+        type: string
+        required: false
     responses:
       200:
         description: All users from the database
@@ -66,7 +79,11 @@ def get_all_users():
               }
             ]
     """
-    users = storage.all(User).values()
+    limit, after = page_args()
+    if limit is None and after is None:
+        users = storage.all(User).values()
+    else:
+        users = storage.page(User, limit, after)
     return jsonify([user.to_dict() for user in users]), 200
 
 
@@ -314,10 +331,11 @@ def update_user(user_id):
     user = storage.get(User, user_id)
     if not user:
         abort(404)
-    for key, val in user_json.items():
-        if key not in ['id', 'email', 'created_at', 'updated_at']:
-            setattr(user, key, val)
-    user.save()
+    with storage.transaction():
+        for key, val in user_json.items():
+            if key not in ['id', 'email', 'created_at', 'updated_at']:
+                setattr(user, key, val)
+        user.save()
     return jsonify(user.to_dict()), 200
 
 
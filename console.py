@@ -7,6 +7,7 @@ import models
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.serializers import serializer_of
 from models.place import Place
 from models.review import Review
 from models.state import State
@@ -69,6 +70,32 @@ class HBNBCommand(cmd.Cmd):
         print(instance.id)
         instance.save()
 
+    def do_import(self, arg):
+        """Creates the instances of a file in a storage file format"""
+        args = shlex.split(arg)
+        if len(args) == 0:
+            print("** file name missing **")
+            return False
+        try:
+            serializer = serializer_of(args[0])
+            f = open(args[0], 'rb' if serializer.binary else 'r')
+        except (ValueError, OSError):
+            print("** file can't be read **")
+            return False
+        count = 0
+
+        def objs():
+            """builds the instances of the records one at a time"""
+            nonlocal count
+            for key, record in serializer.load(f):
+                if record.get("__class__") in classes:
+                    count += 1
+                    yield classes[record["__class__"]](**record)
+        with f:
+            models.storage.bulk_new(objs())
+        models.storage.bulk_save()
+        print(count)
+
     def do_show(self, arg):
         """Prints an instance as a string based on the class and id"""
         args = shlex.split(arg)
@@ -108,18 +135,16 @@ class HBNBCommand(cmd.Cmd):
     def do_all(self, arg):
         """Prints string representations of instances"""
         args = shlex.split(arg)
-        obj_list = []
         if len(args) == 0:
-            obj_dict = models.storage.all()
+            objs = models.storage.iter_all()
         elif args[0] in classes:
-            obj_dict = models.storage.all(classes[args[0]])
+            objs = models.storage.iter_all(classes[args[0]])
         else:
             print("** class doesn't exist **")
             return False
-        for key in obj_dict:
-            obj_list.append(str(obj_dict[key]))
         print("[", end="")
-        print(", ".join(obj_list), end="")
+        for i, (key, obj) in enumerate(objs):
+            print(", " if i else "", obj, sep="", end="")
         print("]")
 
     def do_update(self, arg):
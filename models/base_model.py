@@ -33,12 +33,12 @@ class BaseModel:
                 if key != "__class__":
                     setattr(self, key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
+                self.created_at = datetime.fromisoformat(kwargs["created_at"])
+            elif type(kwargs.get("created_at", None)) is not datetime:
                 self.created_at = datetime.utcnow()
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
+                self.updated_at = datetime.fromisoformat(kwargs["updated_at"])
+            elif type(kwargs.get("updated_at", None)) is not datetime:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
                 self.id = str(uuid.uuid4())
@@ -47,6 +47,15 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    def __setattr__(self, name, value):
+        """sets an attribute and lets the file storage reindex the object"""
+        if models.storage_t == "db":
+            super().__setattr__(name, value)
+            return
+        old = (self.__dict__[name],) if name in self.__dict__ else ()
+        super().__setattr__(name, value)
+        models.storage.touch(self, name, *old)
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
@@ -70,8 +79,10 @@ class BaseModel:
             del new_dict["_sa_instance_state"]
         if "password" in new_dict and models.storage_t == "db":
             del new_dict["password"]
-        if "amenities" in new_dict and models.storage_t == "db":
-            del new_dict["amenities"]
+        if models.storage_t == "db":
+            mapper = sqlalchemy.inspect(self.__class__, raiseerr=False)
+            for key in mapper.relationships.keys() if mapper else ():
+                new_dict.pop(key, None)
         return new_dict
 
     def delete(self):
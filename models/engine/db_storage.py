@@ -7,23 +7,93 @@ import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine.fulltext import TextIndex, text_attributes, text_parents
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from contextlib import contextmanager
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import joinedload, scoped_session, selectinload
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from datetime import timedelta
+import threading
+import time
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class TimedQueuePool(QueuePool):
+    """connection pool recording how long checkouts wait for a
+    connection"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a TimedQueuePool object"""
+        super().__init__(*args, **kwargs)
+        self.timing_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        """checks a connection out, timing the wait"""
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - start
+            with self.timing_lock:
+                self.checkouts += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+
+    def wait_stats(self):
+        """returns the number of checkouts, their total and their longest
+        wait, read together"""
+        with self.timing_lock:
+            return self.checkouts, self.wait_total, self.wait_max
+
+
+class RoutingSession(Session):
+    """session reading from the replica engine, if any, until it writes:
+    from then on it stays pinned to the primary engine"""
+
+    def __init__(self, replica=None, **kwargs):
+        """Instantiate a RoutingSession object"""
+        super().__init__(**kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """returns the engine a statement runs on"""
+        if self.replica is None or self.info.get("primary") or \
+                self._flushing or self.new or self.dirty or self.deleted:
+            return super().get_bind(mapper, clause, **kwargs)
+        return self.replica
+
+
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
+    __read_engine = None
     __session = None
+    # TextIndex - the documents of the full-text search by id, built by
+    # text_scores
+    __text = None
+    # dictionary - class name -> number of rows of the classes of
+    # text_attributes when __text was last updated
+    __text_stamp = None
+    # dictionary - class name of text_parents -> {id: id of its parent}
+    __text_parent = None
+    # dictionary - class name -> {id: updated_at} of the rows indexed
+    # last, of the ones updated at most __text_lag before the latest
+    __text_seen = None
+    # timedelta - how long after its updated_at is set a row may be
+    # committed
+    __text_lag = timedelta(seconds=60)
 
     def __init__(self):
         """Instantiate a DBStorage object"""
@@ -36,51 +106,320 @@ class DBStorage:
                                       format(HBNB_MYSQL_USER,
                                              HBNB_MYSQL_PWD,
                                              HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+                                             HBNB_MYSQL_DB),
+                                      **self.__pool_options())
+        HBNB_MYSQL_READ_HOST = getenv('HBNB_MYSQL_READ_HOST')
+        if HBNB_MYSQL_READ_HOST:
+            self.__read_engine = create_engine(
+                'mysql+mysqldb://{}:{}@{}/{}'.format(HBNB_MYSQL_USER,
+                                                     HBNB_MYSQL_PWD,
+                                                     HBNB_MYSQL_READ_HOST,
+                                                     HBNB_MYSQL_DB),
+                **self.__pool_options())
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
-        new_dict = {}
+    def __pool_options(self):
+        """returns the connection pool settings of the environment"""
+        return {"poolclass": TimedQueuePool,
+                "pool_size": int(getenv('HBNB_MYSQL_POOL_SIZE', 5)),
+                "max_overflow": int(getenv('HBNB_MYSQL_MAX_OVERFLOW', 10)),
+                "pool_recycle": int(getenv('HBNB_MYSQL_POOL_RECYCLE', -1)),
+                "pool_pre_ping": getenv('HBNB_MYSQL_POOL_PRE_PING') == "1",
+                "pool_timeout": float(getenv('HBNB_MYSQL_POOL_TIMEOUT', 30))}
+
+    def pool_stats(self):
+        """returns the state of the connection pools and their checkout wait
+        times"""
+        stats = self.__pool_stats(self.__engine.pool)
+        if self.__read_engine is not None:
+            stats["read"] = self.__pool_stats(self.__read_engine.pool)
+        return stats
+
+    def __pool_stats(self, pool):
+        """returns the state of a connection pool"""
+        checkouts, wait_total, wait_max = pool.wait_stats() \
+            if isinstance(pool, TimedQueuePool) else (0, 0.0, 0.0)
+        return {"size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checkouts": checkouts,
+                "wait_avg_ms": wait_total * 1000 / checkouts
+                if checkouts else 0.0,
+                "wait_max_ms": wait_max * 1000}
+
+    def __load_options(self, cls, load):
+        """returns the eager loading options of the relationship paths of
+        load, like "cities.places", starting from cls: collections are
+        loaded with one SELECT ... IN per level, many-to-one relationships
+        with a join"""
+        options = []
+        for path in load or ():
+            option, current = None, cls
+            for name in path.split("."):
+                attr = getattr(current, name)
+                if attr.property.uselist:
+                    option = selectinload(attr) if option is None \
+                        else option.selectinload(attr)
+                else:
+                    option = joinedload(attr) if option is None \
+                        else option.joinedload(attr)
+                current = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def all(self, cls=None, load=None):
+        """query on the current database session, eagerly loading the
+        relationship paths of load, relative to cls"""
+        return dict(self.iter_all(cls, load))
+
+    def iter_all(self, cls=None, load=None):
+        """yields the (<class name>.id, object) pairs of the objects of cls,
+        or of every class, fetching rows by batches of 1000. With load, the
+        rows are fetched at once: the eager loads could not run their own
+        queries on the connection while it streams rows"""
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                objs = self.__session.query(classes[clss])
+                if load:
+                    objs = objs.options(
+                        *self.__load_options(classes[clss], load)).all()
+                else:
+                    objs = objs.yield_per(1000)
                 for obj in objs:
-                    key = obj.__class__.__name__ + '.' + obj.id
-                    new_dict[key] = obj
-        return (new_dict)
+                    yield clss + '.' + obj.id, obj
+
+    def query(self, *entities):
+        """returns a query of the current database session"""
+        return self.__session.query(*entities)
 
     def new(self, obj):
         """add the object to the current database session"""
+        self.__session.info["primary"] = True
         self.__session.add(obj)
 
+    def bulk_new(self, objs):
+        """inserts the new objects of objs, and updates the others, by
+        batches of 1000 rows without loading them in the session.
+        Their relationships are not saved"""
+        self.__session.info["primary"] = True
+        batch = []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) == 1000:
+                self.__session.bulk_save_objects(batch)
+                batch = []
+        if batch:
+            self.__session.bulk_save_objects(batch)
+
+    def bulk_save(self):
+        """commits the objects added by bulk_new"""
+        self.save()
+
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session. In a
+        transaction, only flushes them until its end"""
+        self.__session.info["primary"] = True
+        if self.__session.info.get("transaction"):
+            self.__session.flush()
+        else:
+            self.__session.commit()
+
+    @contextmanager
+    def transaction(self):
+        """defers the commit of save() to the end of the block, and rolls
+        the session back if the block raises"""
+        info = self.__session.info
+        if info.get("transaction"):
+            yield
+            return
+        info["transaction"] = True
+        try:
+            try:
+                yield
+            finally:
+                info["transaction"] = False
+            self.save()
+        except BaseException:
+            self.__session.rollback()
+            raise
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
+            self.__session.info["primary"] = True
             self.__session.delete(obj)
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
-        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False,
+                                    class_=RoutingSession,
+                                    replica=self.__read_engine)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
     def close(self):
-        """call remove() method on the private session attribute"""
+        """call remove() method on the private session attribute, which
+        unpins the next session from the primary engine"""
         self.__session.remove()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=None):
         """gets a specific object. None if not found"""
+        if id and load:
+            return self.__session.query(cls).options(
+                *self.__load_options(cls, load)).filter(cls.id == id).first()
         if id:
-            return self.__session.query(cls).filter(cls.id == id).first()
+            return self.__session.get(cls, id)
         return None
 
+    def get_many(self, cls, ids, load=None):
+        """gets the objects of a class with one of ids, in the order of ids,
+        with a single query"""
+        ids = [id for id in ids if id]
+        if not ids:
+            return []
+        objs = self.__session.query(cls).options(
+            *self.__load_options(cls, load)).filter(cls.id.in_(ids)).all()
+        by_id = {obj.id: obj for obj in objs}
+        return [by_id[id] for id in ids if id in by_id]
+
+    def page(self, cls, limit=None, after=None, attr=None, value=None):
+        """returns the objects of cls in the order of their ids, from the
+        first id greater than after, at most limit. If attr is given, only
+        the ones whose attr equals value"""
+        cls = classes.get(cls, cls)
+        query = self.__session.query(cls)
+        if attr is not None:
+            query = query.filter(getattr(cls, attr) == value)
+        if after is not None:
+            query = query.filter(cls.id > after)
+        query = query.order_by(cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def prefix_search(self, cls, attr, prefix, limit=None):
+        """returns the objects of cls whose attribute attr starts with
+        prefix, in the order of attr then of their ids, at most limit. The
+        case is ignored as the collation of the column does"""
+        cls = classes.get(cls, cls)
+        pattern = str(prefix).replace("\\", "\\\\").replace(
+            "%", "\\%").replace("_", "\\_") + "%"
+        query = self.__session.query(cls).filter(
+            getattr(cls, attr).like(pattern, escape="\\")).order_by(
+            getattr(cls, attr), cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def text_scores(self, cls, query):
+        """returns {id: BM25 score} of the objects of cls whose document of
+        the full-text index holds a word of query. The index is kept in
+        this process and updated from the rows whose updated_at changed,
+        or built again when rows were deleted"""
+        stamp = {name: self.__session.query(
+            func.count(classes[name].id)).scalar()
+            for name in text_attributes}
+        if self.__text is None or any(
+                stamp[name] < self.__text_stamp[name] for name in stamp):
+            self.__text_build()
+        else:
+            self.__text_refresh()
+            if any(len(self.__text_parent[name]) != stamp[name]
+                   for name in text_parents) or \
+                    sum(stamp[name] for name in stamp
+                        if name not in text_parents) != \
+                    len(self.__text.lengths):
+                self.__text_build()
+        self.__text_stamp = stamp
+        name = cls if type(cls) is str else cls.__name__
+        return {key.partition(".")[2]: score for key, score
+                in self.__text.scores(query).items()
+                if key.partition(".")[0] == name}
+
+    def __text_build(self):
+        """builds the full-text index again from every row"""
+        self.__text, self.__text_parent = TextIndex(), {}
+        self.__text_seen = {}
+        self.__text_refresh()
+
+    def __text_refresh(self):
+        """indexes again the documents of the full-text index holding the
+        text of the rows whose updated_at is not the one indexed last.
+        Only the rows updated at most __text_lag before the latest
+        updated_at seen are read: a row committed after others with a
+        later updated_at is still found"""
+        docs = {name: set() for name in text_attributes
+                if name not in text_parents}
+        for name in text_attributes:
+            cls = classes[name]
+            seen = self.__text_seen.setdefault(name, {})
+            query = self.__session.query(cls.id, cls.updated_at)
+            if seen:
+                since = max(seen.values()) - self.__text_lag
+                query = query.filter(cls.updated_at >= since)
+            if name in text_parents:
+                parent, attr = text_parents[name]
+                parents = self.__text_parent.setdefault(name, {})
+                query = query.add_columns(getattr(cls, attr))
+            for row in query:
+                if row[0] in seen and seen[row[0]] == row[1]:
+                    continue
+                if row[1] is not None:
+                    seen[row[0]] = row[1]
+                if name in text_parents:
+                    if row[0] in parents:
+                        docs[parent].add(parents[row[0]])
+                    docs[parent].add(row[2])
+                else:
+                    docs[name].add(row[0])
+            if seen:
+                since = max(seen.values()) - self.__text_lag
+                self.__text_seen[name] = {id: updated_at for id, updated_at
+                                          in seen.items()
+                                          if updated_at >= since}
+        for name, ids in docs.items():
+            ids = list(ids)
+            for i in range(0, len(ids), 1000):
+                self.__text_index(name, ids[i:i + 1000])
+
+    def __text_index(self, name, ids):
+        """indexes again the documents of the objects of the class name
+        with ids, from their text and their children's"""
+        cls = classes[name]
+        texts = {id: [] for id in ids}
+        found = set()
+        for row in self.__session.query(
+                cls.id, *(getattr(cls, attr)
+                          for attr in text_attributes[name])).filter(
+                cls.id.in_(ids)):
+            found.add(row[0])
+            texts[row[0]] += row[1:]
+        for child, (parent, attr) in text_parents.items():
+            if parent != name:
+                continue
+            child_cls = classes[child]
+            for row in self.__session.query(
+                    child_cls.id, getattr(child_cls, attr),
+                    *(getattr(child_cls, child_attr)
+                      for child_attr in text_attributes[child])).filter(
+                    getattr(child_cls, attr).in_(ids)):
+                self.__text_parent[child][row[0]] = row[1]
+                texts[row[1]] += row[2:]
+        for id, text in texts.items():
+            if id in found:
+                self.__text.add(name + "." + id,
+                                [value for value in text if value is not None])
+            else:
+                self.__text.remove(name + "." + id)
+
     def count(self, cls=None):
         """counts the number of objects of storage, or of class if provided"""
-        return len(self.all(cls))
+        total = 0
+        for clss in classes:
+            if cls is None or cls is classes[clss] or cls is clss:
+                total += self.__session.query(
+                    func.count(classes[clss].id)).scalar()
+        return total
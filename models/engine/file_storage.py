@@ -3,10 +3,25 @@
 Contains the FileStorage class
 """
 
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+import heapq
 import json
+import os
+from os import getenv
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.fulltext import TextIndex, text_attributes, text_parents
+from models.engine.geo import Grid, valid_point
+from models.engine.serializers import serializer_named, serializers
 from models.place import Place
 from models.review import Review
 from models.state import State
@@ -15,67 +30,1130 @@ from models.user import User
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# foreign keys, and lists of them, indexed for the relationship getters
+# and the searches, by class name
+foreign_keys = {"City": ("state_id",),
+                "Place": ("city_id", "user_id", "amenity_ids"),
+                "Review": ("place_id", "user_id")}
+
+
+# attributes kept in sorted indexes for the range searches of the numeric
+# ones and the prefix searches of the names, by class name
+columns = {"City": ("name",),
+           "Place": ("number_rooms", "number_bathrooms", "max_guest",
+                     "price_by_night"),
+           "State": ("name",)}
+
+# (latitude, longitude) attributes kept in grids for the geographic
+# searches, by class name
+points = {"Place": ("latitude", "longitude")}
+
+
+def column_value(value):
+    """returns the sort key of a value in a sorted index: the numbers in
+    their order, then the other values as case-folded strings"""
+    if (type(value) is int or type(value) is float) and value == value:
+        return (0, value)
+    return (1, str(value).casefold())
+
+
+def index_values(value):
+    """returns the values a foreign key value is indexed under: each id of
+    a list of ids"""
+    if type(value) is list or type(value) is tuple:
+        return tuple(value)
+    return (value,)
+
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
-    # string - path to the JSON file
-    __file_path = "file.json"
+    # string - format of the file: "json", "pickle" or "msgpack"
+    __format = getenv("HBNB_FILE_FORMAT", "json")
+    # string - path to the JSON file, or file.<format> for other formats
+    __file_path = "file." + serializer_named(__format).extension
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - the objects of __objects bucketed by class name
+    __buckets = {}
+    # dictionary - (class name, foreign key) -> {value: {key: object}}
+    __fk_index = {}
+    # dictionary - (class name, foreign key) -> {key: indexed value}
+    __fk_value = {}
+    # the __objects dictionary __buckets and the indexes were built from
+    __indexed = None
+    # (mtime, size, inode) of the JSON file and journal, and the generation,
+    # when last read or written
+    __stamp = None
+    # lock serializing the threads of this process around file accesses
+    __thread_lock = threading.RLock()
+    # file descriptor of the lock file while this process holds its lock
+    __lock_fd = None
+    # boolean - whether save() appends changes to a journal file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # integer - journal size in bytes from which save() compacts it
+    __journal_limit = int(getenv("HBNB_FILE_JOURNAL_LIMIT", 1 << 20))
+    # string - when writes are fsynced: "always", "batched" or "never"
+    __fsync = getenv("HBNB_FILE_FSYNC", "always")
+    # float - seconds between two fsyncs when batched
+    __fsync_interval = float(getenv("HBNB_FILE_FSYNC_INTERVAL", 1))
+    # float - time of the last fsync
+    __fsynced = 0.0
+    # threading.Timer - fsyncs the writes the batched policy left unsynced
+    # once the interval has passed, None if none is pending
+    __fsync_timer = None
+    # set - keys new, deleted or changed since the last save, None if unknown
+    __dirty = None
+    # dictionary - serialized form of the objects as last saved or loaded
+    __serialized = {}
+    # boolean - whether records are only built into objects once reached
+    __lazy = getenv("HBNB_FILE_LAZY") == "1"
+    # boolean - whether a lazy reload() has yet to read the file
+    __deferred = False
+    # dictionary - class name -> {key: record} read but not built yet
+    __raw = {}
+    # dictionary - (class name, foreign key) -> {value: keys of __raw}
+    __raw_fk = {}
+    # dictionary - class name -> sorted ids of its objects and records,
+    # built by page() and possibly holding ids deleted since
+    __sorted = {}
+    # dictionary - class name -> {key: position of its bit in the bitmaps}
+    __positions = {}
+    # dictionary - class name -> objects by bit position, None once
+    # unindexed
+    __positioned = {}
+    # dictionary - (class name, foreign key) -> {value: bitmap of the
+    # positions of the objects indexed under value}, built by lookup_bitmap
+    __fk_bits = {}
+    # dictionary - (class name, column) -> sorted (column_value, key) of its
+    # objects, built by range_bitmap and iter_sorted
+    __columns = {}
+    # dictionary - (class name, column) -> {key: its entry in __columns}
+    __column_entry = {}
+    # dictionary - (class name, column) -> {column_value: bitmap of the
+    # positions of the objects with that value}, built by range_bitmap,
+    # None for a column of more than __column_values values
+    __column_bits = {}
+    # integer - number of values from which a column has no bitmaps
+    __column_values = 1024
+    # dictionary - class name -> Grid of the points of its objects, built
+    # by box_bitmap and iter_nearest
+    __grids = {}
+    # TextIndex - the documents of the full-text search by key, built by
+    # text_search
+    __text = None
+    # dictionary - key -> (object before the transaction or None,
+    # {attribute: (previous value,) or () if it had none}), None outside of
+    # a transaction
+    __undo = None
+    # boolean - whether save() was called during the transaction
+    __save_pending = False
+
+    def __journal_path(self):
+        """returns the path of the journal of the JSON file"""
+        return self.__file_path + ".journal"
+
+    def __lock_path(self):
+        """returns the path of the lock file, which holds the generation"""
+        return self.__file_path + ".lock"
+
+    @contextmanager
+    def __locked(self, exclusive=False):
+        """holds the advisory lock of the JSON file, shared or exclusive"""
+        with FileStorage.__thread_lock:
+            if FileStorage.__lock_fd is not None or fcntl is None:
+                yield
+                return
+            fd = os.open(self.__lock_path(), os.O_RDWR | os.O_CREAT, 0o644)
+            FileStorage.__lock_fd = fd
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                yield
+            finally:
+                FileStorage.__lock_fd = None
+                os.close(fd)
+
+    def __generation(self):
+        """returns the number of writes recorded in the lock file"""
+        try:
+            with open(self.__lock_path(), 'r') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return None
+
+    def __bump_generation(self):
+        """records one more write in the lock file"""
+        generation = (self.__generation() or 0) + 1
+        if FileStorage.__lock_fd is not None:
+            os.ftruncate(FileStorage.__lock_fd, 0)
+            os.pwrite(FileStorage.__lock_fd, str(generation).encode(), 0)
+
+    def __file_stamp(self):
+        """returns the (mtime, size, inode) of the JSON file and journal,
+        None for a missing file, and the generation"""
+        stamp = ()
+        for path in (self.__file_path, self.__journal_path()):
+            try:
+                st = os.stat(path)
+                stamp += ((st.st_mtime_ns, st.st_size, st.st_ino),)
+            except OSError:
+                stamp += (None,)
+        return stamp + (self.__generation(),)
+
+    def __flush(self, f):
+        """flushes the file f, fsyncing it as the fsync policy says. When
+        batched, a write not fsynced now is fsynced by a timer at most the
+        interval after the last fsync"""
+        f.flush()
+        if FileStorage.__fsync == "never":
+            return False
+        if FileStorage.__fsync == "batched":
+            wait = FileStorage.__fsync_interval - \
+                (time.monotonic() - FileStorage.__fsynced)
+            if wait > 0:
+                if FileStorage.__fsync_timer is None:
+                    timer = threading.Timer(wait, self.__fsync_files)
+                    timer.daemon = True
+                    FileStorage.__fsync_timer = timer
+                    timer.start()
+                return False
+        os.fsync(f.fileno())
+        FileStorage.__fsynced = time.monotonic()
+        return True
+
+    def __fsync_files(self):
+        """fsyncs the JSON file, its journal and their folder"""
+        with FileStorage.__thread_lock:
+            FileStorage.__fsync_timer = None
+            for path in (self.__file_path, self.__journal_path(),
+                         os.path.dirname(os.path.abspath(self.__file_path))):
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            FileStorage.__fsynced = time.monotonic()
+
+    def __replace(self, path, data):
+        """atomically replaces the file at path with data serialized in the
+        format of the storage"""
+        serializer = serializers[FileStorage.__format]
+        folder, name = os.path.split(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=name + ".")
+        try:
+            os.chmod(tmp, os.stat(path).st_mode if os.path.exists(path)
+                     else 0o644)
+            with os.fdopen(fd, 'wb' if serializer.binary else 'w') as f:
+                serializer.dump(data, f)
+                synced = self.__flush(f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if synced:
+            fd = os.open(folder, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def __serialize(self, full=False):
+        """serializes the objects changed since the last save into
+        __serialized, returns the (put, delete) changes. If full, also
+        serializes the objects missing from __serialized"""
+        dirty = FileStorage.__dirty
+        if dirty is None:
+            FileStorage.__serialized = {}
+        if dirty is None or full:
+            dirty = set(dirty or ()) | \
+                (self.__objects.keys() - FileStorage.__serialized.keys())
+        put, delete = {}, []
+        for key in dirty:
+            if key in self.__objects:
+                put[key] = self.__objects[key].to_dict()
+                FileStorage.__serialized[key] = put[key]
+            else:
+                delete.append(key)
+                FileStorage.__serialized.pop(key, None)
+        FileStorage.__dirty = set()
+        return put, delete
+
+    def __mark(self, key):
+        """marks key as changed since the last save"""
+        if FileStorage.__dirty is not None:
+            FileStorage.__dirty.add(key)
+
+    def __sync(self):
+        """reads the file if a lazy reload() deferred it, then rebuilds the
+        buckets and the indexes if __objects was replaced or changed
+        directly. The other threads wait for the deferred reload to end"""
+        if FileStorage.__deferred:
+            with FileStorage.__thread_lock:
+                if FileStorage.__deferred:
+                    self.__reload()
+                    FileStorage.__deferred = False
+        self.__rebuild()
+
+    def __indexes_stale(self):
+        """returns whether the buckets and the indexes were not built from
+        __objects as it is"""
+        objects = FileStorage.__objects
+        return FileStorage.__indexed is not objects or \
+            sum(map(len, FileStorage.__buckets.values())) != len(objects)
+
+    def __rebuild(self):
+        """rebuilds the buckets and the indexes if __objects was replaced
+        or changed directly. They also look stale while another thread
+        changes the storage, so they are checked again holding the thread
+        lock, once that thread is done"""
+        if not self.__indexes_stale():
+            return
+        with FileStorage.__thread_lock:
+            if not self.__indexes_stale():
+                return
+            objects = FileStorage.__objects
+            FileStorage.__buckets = {}
+            FileStorage.__fk_index = {}
+            FileStorage.__fk_value = {}
+            FileStorage.__raw = {}
+            FileStorage.__raw_fk = {}
+            FileStorage.__sorted = {}
+            self.__drop_derived()
+            for key, obj in objects.items():
+                self.__index(key, obj)
+            FileStorage.__indexed = objects
+            FileStorage.__dirty = None
+
+    def __bucket(self, cls, create=False):
+        """returns the bucket of a class or class name"""
+        name = cls if type(cls) is str else cls.__name__
+        if create:
+            return FileStorage.__buckets.setdefault(name, {})
+        return FileStorage.__buckets.get(name, {})
+
+    def __index(self, key, obj, attrs=None):
+        """adds obj to its class bucket and to its foreign key indexes"""
+        name = obj.__class__.__name__
+        indexed = attrs is None
+        if attrs is None:
+            self.__bucket(name, True)[key] = obj
+            self.__sort(key)
+            if name in FileStorage.__positions:
+                FileStorage.__positions[name][key] = \
+                    len(FileStorage.__positioned[name])
+                FileStorage.__positioned[name].append(obj)
+            self.__column_add(key, obj, columns.get(name, ()))
+            self.__grid_add(key, obj)
+            attrs = foreign_keys.get(name, ())
+        for attr in attrs:
+            values = index_values(getattr(obj, attr, None))
+            index = FileStorage.__fk_index.setdefault((name, attr), {})
+            for value in values:
+                index.setdefault(value, {})[key] = obj
+            FileStorage.__fk_value.setdefault((name, attr), {})[key] = values
+            bitmaps = FileStorage.__fk_bits.get((name, attr))
+            if bitmaps is not None:
+                bit = 1 << FileStorage.__positions[name][key]
+                for value in values:
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+        if indexed and FileStorage.__text is not None:
+            self.__text_update(*self.__text_document(obj))
+
+    def __unindex(self, key, obj, attrs=None):
+        """removes obj from its class bucket and its foreign key indexes"""
+        name = obj.__class__.__name__
+        unpositioned = attrs is None
+        if attrs is None:
+            self.__bucket(name).pop(key, None)
+            self.__column_remove(key, obj, columns.get(name, ()))
+            self.__grid_remove(key, obj)
+            attrs = foreign_keys.get(name, ())
+        for attr in attrs:
+            index = FileStorage.__fk_index[(name, attr)]
+            bitmaps = FileStorage.__fk_bits.get((name, attr))
+            if bitmaps is not None:
+                mask = ~(1 << FileStorage.__positions[name][key])
+            for value in FileStorage.__fk_value[(name, attr)].pop(key):
+                if value in index:
+                    index[value].pop(key, None)
+                    if not index[value]:
+                        del index[value]
+                if bitmaps is not None and value in bitmaps:
+                    bitmaps[value] &= mask
+                    if not bitmaps[value]:
+                        del bitmaps[value]
+        if unpositioned and FileStorage.__text is not None:
+            self.__text_update(*self.__text_document(obj))
+        if unpositioned and name in FileStorage.__positions:
+            positioned = FileStorage.__positioned[name]
+            positioned[FileStorage.__positions[name].pop(key)] = None
+            if len(positioned) > 2 * len(FileStorage.__positions[name]) + 64:
+                self.__drop_derived(name)
+
+    def __drop_derived(self, name=None):
+        """forgets the bit positions, the bitmaps, the sorted columns and the
+        grids of a class, or of every class and the full-text index, to be
+        built again once needed"""
+        if name is None:
+            FileStorage.__text = None
+            FileStorage.__grids = {}
+            FileStorage.__positions = {}
+            FileStorage.__positioned = {}
+            FileStorage.__fk_bits = {}
+            FileStorage.__columns = {}
+            FileStorage.__column_entry = {}
+            FileStorage.__column_bits = {}
+            return
+        FileStorage.__positions.pop(name, None)
+        FileStorage.__positioned.pop(name, None)
+        FileStorage.__grids.pop(name, None)
+        for indexes in (FileStorage.__fk_bits, FileStorage.__columns,
+                        FileStorage.__column_entry, FileStorage.__column_bits):
+            for index in [index for index in indexes if index[0] == name]:
+                del indexes[index]
+
+    def __column_add(self, key, obj, attrs):
+        """adds obj to the built sorted columns of attrs"""
+        name = obj.__class__.__name__
+        for attr in attrs:
+            column = FileStorage.__columns.get((name, attr))
+            if column is None:
+                continue
+            entry = (column_value(getattr(obj, attr, None)), key)
+            insort(column, entry)
+            FileStorage.__column_entry[(name, attr)][key] = entry
+            bitmaps = FileStorage.__column_bits.get((name, attr))
+            if bitmaps is not None:
+                bitmaps[entry[0]] = bitmaps.get(entry[0], 0) | \
+                    1 << FileStorage.__positions[name][key]
+                if len(bitmaps) > FileStorage.__column_values:
+                    FileStorage.__column_bits[(name, attr)] = None
+
+    def __column_remove(self, key, obj, attrs):
+        """removes obj from the built sorted columns of attrs"""
+        name = obj.__class__.__name__
+        for attr in attrs:
+            column = FileStorage.__columns.get((name, attr))
+            if column is None:
+                continue
+            entry = FileStorage.__column_entry[(name, attr)].pop(key)
+            del column[bisect_left(column, entry)]
+            bitmaps = FileStorage.__column_bits.get((name, attr))
+            if bitmaps is not None and entry[0] in bitmaps:
+                bitmaps[entry[0]] &= ~(1 << FileStorage.__positions[name][key])
+                if not bitmaps[entry[0]]:
+                    del bitmaps[entry[0]]
+
+    def __column(self, name, attr):
+        """returns the sorted column of attr of the class name, building
+        it if needed"""
+        column = FileStorage.__columns.get((name, attr))
+        if column is None:
+            self.__build(FileStorage.__raw.get(name, ()))
+            entries = {key: (column_value(getattr(obj, attr, None)), key)
+                       for key, obj in self.__bucket(name).items()}
+            column = sorted(entries.values())
+            FileStorage.__columns[(name, attr)] = column
+            FileStorage.__column_entry[(name, attr)] = entries
+        return column
+
+    def __column_bitmaps(self, name, attr):
+        """returns the bitmaps of the values of the sorted column of attr of
+        the class name, building them if needed. None if it has too many
+        values"""
+        if (name, attr) not in FileStorage.__column_bits:
+            column = self.__column(name, attr)
+            positions = self.__position(name)
+            size = len(FileStorage.__positioned[name]) // 8 + 1
+            bitmaps, bitmap, current = {}, None, None
+            for value, key in column:
+                if value != current:
+                    if bitmap is not None:
+                        bitmaps[current] = int.from_bytes(bitmap, "little")
+                    if len(bitmaps) >= FileStorage.__column_values:
+                        bitmaps = bitmap = None
+                        break
+                    bitmap, current = bytearray(size), value
+                bitmap[positions[key] >> 3] |= 1 << (positions[key] & 7)
+            if bitmap is not None:
+                bitmaps[current] = int.from_bytes(bitmap, "little")
+            FileStorage.__column_bits[(name, attr)] = bitmaps
+        return FileStorage.__column_bits[(name, attr)]
+
+    def __grid_add(self, key, obj):
+        """adds obj to the built grid of its class if its point was set,
+        the defaults of the class not being a point"""
+        name = obj.__class__.__name__
+        grid = FileStorage.__grids.get(name)
+        if grid is None or name not in points:
+            return
+        point = tuple(obj.__dict__.get(attr) for attr in points[name])
+        if valid_point(*point):
+            grid.add(key, *point)
+
+    def __grid_remove(self, key, obj):
+        """removes obj from the built grid of its class"""
+        grid = FileStorage.__grids.get(obj.__class__.__name__)
+        if grid is not None:
+            grid.remove(key)
+
+    def __grid(self, name):
+        """returns the grid of the class name, building it if needed"""
+        if name not in FileStorage.__grids:
+            self.__build(FileStorage.__raw.get(name, ()))
+            FileStorage.__grids[name] = Grid()
+            for key, obj in self.__bucket(name).items():
+                self.__grid_add(key, obj)
+        return FileStorage.__grids[name]
+
+    def __text_document(self, obj):
+        """returns the (class name, id) of the document of the full-text
+        index holding the text of obj"""
+        name = obj.__class__.__name__
+        if name in text_parents:
+            parent, attr = text_parents[name]
+            return parent, getattr(obj, attr, None)
+        return name, getattr(obj, "id", None)
+
+    def __text_update(self, name, id):
+        """indexes again the document of the object of the class name with
+        id in the full-text index, from its text and its children's"""
+        if name not in text_attributes or name in text_parents:
+            return
+        key = name + "." + str(id)
+        obj = self.__bucket(name).get(key)
+        if obj is None:
+            FileStorage.__text.remove(key)
+            return
+        texts = [getattr(obj, attr, None) for attr in text_attributes[name]]
+        for child, (parent, attr) in text_parents.items():
+            if parent == name:
+                for child_obj in FileStorage.__fk_index.get(
+                        (child, attr), {}).get(id, {}).values():
+                    texts += [getattr(child_obj, child_attr, None)
+                              for child_attr in text_attributes[child]]
+        FileStorage.__text.add(key, [text for text in texts
+                                     if text is not None])
+
+    def __position(self, name):
+        """returns the bit positions of the objects of the class name,
+        numbering them if needed"""
+        if name not in FileStorage.__positions:
+            self.__build(FileStorage.__raw.get(name, ()))
+            bucket = self.__bucket(name)
+            FileStorage.__positioned[name] = list(bucket.values())
+            FileStorage.__positions[name] = {key: i for i, key
+                                             in enumerate(bucket)}
+        return FileStorage.__positions[name]
+
+    def __sort(self, key):
+        """adds the id of key to the sorted ids of its class, once built"""
+        ids = FileStorage.__sorted.get(key.partition(".")[0])
+        if ids is not None:
+            id = key.partition(".")[2]
+            i = bisect_left(ids, id)
+            if i == len(ids) or ids[i] != id:
+                ids.insert(i, id)
+
+    def __stash(self, key, jd):
+        """keeps the record jd read from the file unbuilt until reached"""
+        name = jd["__class__"]
+        FileStorage.__raw.setdefault(name, {})[key] = jd
+        self.__sort(key)
+        for attr in foreign_keys.get(name, ()):
+            index = FileStorage.__raw_fk.setdefault((name, attr), {})
+            for value in index_values(
+                    jd.get(attr, getattr(classes[name], attr, None))):
+                index.setdefault(value, set()).add(key)
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def __unstash(self, key):
+        """forgets the unbuilt record of key and returns it, None if none"""
+        name = key.partition(".")[0]
+        records = FileStorage.__raw.get(name)
+        if not records or key not in records:
+            return None
+        jd = records.pop(key)
+        if not records:
+            del FileStorage.__raw[name]
+        for attr in foreign_keys.get(name, ()):
+            index = FileStorage.__raw_fk.get((name, attr), {})
+            for value in index_values(
+                    jd.get(attr, getattr(classes[name], attr, None))):
+                if value in index:
+                    index[value].discard(key)
+                    if not index[value]:
+                        del index[value]
+        return jd
+
+    def __build(self, keys):
+        """builds the objects of the unbuilt records of keys"""
+        for key in list(keys):
+            jd = self.__unstash(key)
+            if jd is not None:
+                self.__put(key, classes[jd["__class__"]](**jd))
+                FileStorage.__serialized[key] = jd
+
+    def __put(self, key, obj):
+        """sets obj in __objects under key and indexes it"""
+        self.__unstash(key)
+        old = self.__objects.get(key)
+        if old is not None:
+            self.__unindex(key, old)
+        self.__objects[key] = obj
+        self.__index(key, obj)
+
+    def __remember(self, key):
+        """returns the undo entry of key in the transaction, recording the
+        object stored under key first if it is the first change of key"""
+        entry = FileStorage.__undo.get(key)
+        if entry is None:
+            self.__build((key,))
+            entry = (self.__objects.get(key), {})
+            FileStorage.__undo[key] = entry
+        return entry
+
+    def __rollback(self, undo):
+        """puts back the objects and attributes of undo"""
+        for key, (obj, attrs) in undo.items():
+            current = self.__objects.pop(key, None)
+            if current is not None:
+                self.__unindex(key, current)
+            if obj is not None:
+                for name, old in attrs.items():
+                    if old:
+                        obj.__dict__[name] = old[0]
+                    else:
+                        obj.__dict__.pop(name, None)
+                self.__objects[key] = obj
+                self.__index(key, obj)
+            self.__mark(key)
+
+    @contextmanager
+    def transaction(self):
+        """defers save() to the end of the block, where it saves once. If
+        the block raises, the objects stored, deleted or whose attributes
+        were set in it are put back as they were"""
+        with FileStorage.__thread_lock:
+            if FileStorage.__undo is not None:
+                yield
+                return
+            self.__sync()
+            undo = FileStorage.__undo = {}
+            FileStorage.__save_pending = False
+            try:
+                try:
+                    yield
+                finally:
+                    FileStorage.__undo = None
+                if FileStorage.__save_pending:
+                    self.save()
+            except BaseException:
+                self.__rollback(undo)
+                raise
+
+    def all(self, cls=None, load=None):
+        """returns the dictionary __objects, or only the objects of cls.
+        load is ignored: relationships are read from in memory indexes"""
+        self.__sync()
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            name = cls if type(cls) is str else cls.__name__
+            self.__build(FileStorage.__raw.get(name, ()))
+            return dict(self.__bucket(name))
+        for records in list(FileStorage.__raw.values()):
+            self.__build(records)
         return self.__objects
 
+    def iter_all(self, cls=None, load=None):
+        """yields the (<class name>.id, object) pairs of the objects of cls,
+        or of every class, building lazy records one at a time"""
+        self.__sync()
+        if cls is not None:
+            names = [cls if type(cls) is str else cls.__name__]
+        else:
+            names = list(FileStorage.__buckets.keys() |
+                         FileStorage.__raw.keys())
+        for name in names:
+            yield from list(self.__bucket(name).items())
+            for key in list(FileStorage.__raw.get(name, ())):
+                self.__build((key,))
+                if key in self.__objects:
+                    yield key, self.__objects[key]
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
-            key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            with FileStorage.__thread_lock:
+                self.__sync()
+                key = obj.__class__.__name__ + "." + obj.id
+                if FileStorage.__undo is not None:
+                    self.__remember(key)
+                self.__put(key, obj)
+                self.__mark(key)
+
+    def bulk_new(self, objs):
+        """sets in __objects every object of objs. Past 1000 objects, the
+        bitmaps are built again once needed instead of updated"""
+        with FileStorage.__thread_lock:
+            self.__sync()
+            for i, obj in enumerate(objs):
+                if i == 1000:
+                    self.__drop_derived()
+                key = obj.__class__.__name__ + "." + obj.id
+                if FileStorage.__undo is not None:
+                    self.__remember(key)
+                self.__put(key, obj)
+                self.__mark(key)
+
+    def bulk_save(self):
+        """writes the objects added by bulk_new with a single save"""
+        self.save()
+
+    def touch(self, obj, name, *old):
+        """marks obj as changed and updates the indexes after its attribute
+        name changed from old, if it had a value"""
+        key = obj.__class__.__name__ + "." + str(obj.__dict__.get("id"))
+        if self.__objects.get(key) is not obj:
+            return
+        with FileStorage.__thread_lock:
+            self.__sync()
+            if FileStorage.__undo is not None:
+                entry = self.__remember(key)
+                if entry[0] is obj:
+                    entry[1].setdefault(name, old)
+            self.__mark(key)
+            self.__touch_indexes(key, obj, name, old)
+
+    def __touch_indexes(self, key, obj, name, old):
+        """updates the indexes of obj after its attribute name changed from
+        old, if it had a value"""
+        if name in foreign_keys.get(obj.__class__.__name__, ()):
+            self.__unindex(key, obj, (name,))
+            self.__index(key, obj, (name,))
+        if name in columns.get(obj.__class__.__name__, ()):
+            self.__column_remove(key, obj, (name,))
+            self.__column_add(key, obj, (name,))
+        if name in points.get(obj.__class__.__name__, ()):
+            self.__grid_remove(key, obj)
+            self.__grid_add(key, obj)
+        texts = text_attributes.get(obj.__class__.__name__, ())
+        parent, parent_attr = text_parents.get(obj.__class__.__name__,
+                                               (None, None))
+        if FileStorage.__text is not None and \
+                (name in texts or name == parent_attr):
+            self.__text_update(*self.__text_document(obj))
+            if old and name == parent_attr:
+                self.__text_update(parent, old[0])
+
+    def lookup(self, cls, attr, value):
+        """returns the list of objects of cls whose attr equals value"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        if attr in foreign_keys.get(name, ()):
+            self.__build(FileStorage.__raw_fk.get((name, attr), {})
+                         .get(value, ()))
+            return list(FileStorage.__fk_index.get((name, attr), {})
+                        .get(value, {}).values())
+        return [obj for obj in self.all(name).values()
+                if getattr(obj, attr, None) == value]
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path), or
+        appends the changes since the last save to its journal. Changes
+        written by another process meanwhile are merged first. In a
+        transaction, waits for its end"""
+        with FileStorage.__thread_lock:
+            if FileStorage.__undo is not None:
+                FileStorage.__save_pending = True
+                return
+            self.__save()
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+    def __save(self):
+        """writes the changes since the last save, outside of a
+        transaction"""
+        with self.__locked(exclusive=True):
+            self.__sync()
+            if FileStorage.__dirty is not None and \
+                    self.__file_stamp() != FileStorage.__stamp:
+                self.reload()
+            if not FileStorage.__journal or FileStorage.__dirty is None:
+                self.compact()
+                return
+            put, delete = self.__serialize()
+            self.__cut_torn_journal()
+            with open(self.__journal_path(), 'a') as f:
+                f.write(json.dumps({"put": put, "delete": delete}) + "\n")
+                size = f.tell()
+                self.__flush(f)
+            self.__bump_generation()
+            FileStorage.__stamp = self.__file_stamp()
+            if size >= FileStorage.__journal_limit:
+                self.compact()
+
+    def __cut_torn_journal(self):
+        """truncates the journal after its last complete line, dropping
+        what a crash during an append left of it"""
+        try:
+            with open(self.__journal_path(), 'rb+') as f:
+                end = f.seek(0, os.SEEK_END)
+                f.seek(max(end - 1, 0))
+                if f.read(1) in (b"", b"\n"):
+                    return
+                while end > 0:
+                    start = max(end - 4096, 0)
+                    f.seek(start)
+                    i = f.read(end - start).rfind(b"\n")
+                    if i != -1:
+                        end = start + i + 1
+                        break
+                    end = start
+                f.truncate(end)
+        except FileNotFoundError:
+            pass
+
+    def compact(self):
+        """writes every object to the JSON file and empties its journal"""
+        with self.__locked(exclusive=True):
+            self.__sync()
+            self.__serialize(True)
+            data = FileStorage.__serialized
+            if FileStorage.__raw:
+                data = dict(data)
+                for records in FileStorage.__raw.values():
+                    data.update(records)
+            self.__replace(self.__file_path, data)
+            if os.path.exists(self.__journal_path()):
+                os.remove(self.__journal_path())
+            self.__bump_generation()
+            FileStorage.__stamp = self.__file_stamp()
+
+    def __snapshot_records(self):
+        """yields the (key, record) pairs of the file one at a time"""
+        serializer = serializers[FileStorage.__format]
+        try:
+            with open(self.__file_path,
+                      'rb' if serializer.binary else 'r') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                yield from serializer.load(f)
+        except FileNotFoundError:
+            pass
+
+    def __journal_records(self):
+        """returns the records of the journal by key, None for a deleted
+        key. Replay stops at a torn line"""
+        records = {}
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except:
+            with open(self.__journal_path(), 'r') as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    records.update(dict.fromkeys(record["delete"]))
+                    records.update(record["put"])
+        except FileNotFoundError:
             pass
+        return records
+
+    def reload(self):
+        """deserializes the JSON file to __objects, then replays its
+        journal. Objects changed since the last save are left as they are
+        and objects deleted from the file are dropped. In lazy mode, the
+        file is only read once the storage is used, and its records are
+        built into objects once reached"""
+        if FileStorage.__lazy:
+            FileStorage.__deferred = True
+        else:
+            self.__reload()
+
+    def __reload(self):
+        """reads the JSON file and its journal into the storage"""
+        with self.__locked():
+            FileStorage.__stamp = self.__file_stamp()
+            self.__rebuild()
+            self.__drop_derived()
+            dirty = FileStorage.__dirty
+            seen = None
+            if self.__objects or FileStorage.__raw:
+                seen = set()
+            elif dirty is None:
+                dirty = set()
+                FileStorage.__serialized = {}
+            journal = self.__journal_records()
+            for key, jd in self.__snapshot_records():
+                if seen is not None:
+                    seen.add(key)
+                if key not in journal:
+                    self.__load(key, jd, dirty)
+            for key, jd in journal.items():
+                if seen is not None:
+                    seen.add(key)
+                self.__load(key, jd, dirty)
+            if dirty is not None:
+                if seen is not None:
+                    for key in [key for key in self.__objects
+                                if key not in seen and key not in dirty]:
+                        self.__load(key, None, dirty)
+                    for records in list(FileStorage.__raw.values()):
+                        for key in [key for key in records
+                                    if key not in seen]:
+                            self.__unstash(key)
+                FileStorage.__dirty = dirty
+
+    def __load(self, key, jd, dirty):
+        """builds the object of the record jd read from the file, or drops
+        it if jd is None, unless key changed since the last save. The key
+        is not marked as changed: it holds what the file holds"""
+        if dirty is not None and key in dirty:
+            return
+        if jd is None or FileStorage.__lazy:
+            obj = self.__objects.pop(key, None)
+            if obj is not None:
+                self.__unindex(key, obj)
+            self.__unstash(key)
+        if jd is not None and FileStorage.__lazy:
+            self.__stash(key, jd)
+        elif jd is not None:
+            self.__put(key, classes[jd["__class__"]](**jd))
+        FileStorage.__serialized.pop(key, None)
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
-            key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with FileStorage.__thread_lock:
+                self.__sync()
+                key = obj.__class__.__name__ + '.' + obj.id
+                if FileStorage.__undo is not None:
+                    self.__remember(key)
+                if key in self.__objects:
+                    self.__unindex(key, self.__objects.pop(key))
+                    self.__mark(key)
+                elif self.__unstash(key) is not None:
+                    self.__mark(key)
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """call reload() method for deserializing the JSON file to objects,
+        unless the file is unchanged since it was last read or written"""
+        if self.__file_stamp() != FileStorage.__stamp:
+            self.reload()
 
-    def get(self, cls, id):
+    def get(self, cls, id, load=None):
         """gets a specific object. None if not found"""
         if id:
+            self.__sync()
             key = cls.__name__ + "." + id
-            return self.__objects.get(key)
+            self.__build((key,))
+            return self.__bucket(cls).get(key)
         return None
 
+    def get_many(self, cls, ids, load=None):
+        """gets the objects of a class with one of ids, in the order of ids,
+        skipping the ones not found"""
+        objs = [self.get(cls, id) for id in ids]
+        return [obj for obj in objs if obj is not None]
+
+    def lookup_bitmap(self, cls, attr, value):
+        """returns the bitmap of the objects of cls whose foreign key attr
+        equals or lists value, in the bit positions of bitmap_objects"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        if (name, attr) not in FileStorage.__fk_bits:
+            self.__build(FileStorage.__raw.get(name, ()))
+            positions = self.__position(name)
+            size = len(FileStorage.__positioned[name]) // 8 + 1
+            bitmaps = {}
+            for val, objs in FileStorage.__fk_index.get((name, attr),
+                                                        {}).items():
+                bitmap = bytearray(size)
+                for key in objs:
+                    bitmap[positions[key] >> 3] |= 1 << (positions[key] & 7)
+                bitmaps[val] = int.from_bytes(bitmap, "little")
+            FileStorage.__fk_bits[(name, attr)] = bitmaps
+        return FileStorage.__fk_bits[(name, attr)].get(value, 0)
+
+    def range_bitmap(self, cls, attr, low=None, high=None):
+        """returns the bitmap of the objects of cls whose numeric attribute
+        attr is between low and high included, in the bit positions of
+        bitmap_objects. attr must be one of the columns of cls"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        column = self.__column(name, attr)
+        positions = self.__position(name)
+        bitmaps = self.__column_bitmaps(name, attr)
+        if bitmaps is not None:
+            low_value = (0, float("-inf") if low is None else low)
+            high_value = (0, float("inf") if high is None else high)
+            bitmap = 0
+            for value, value_bitmap in bitmaps.items():
+                if low_value <= value <= high_value:
+                    bitmap |= value_bitmap
+            return bitmap
+        start = 0 if low is None else bisect_left(column, ((0, low),))
+        end = bisect_left(column, ((1,),)) if high is None else \
+            bisect_right(column, ((0, high), chr(0x10ffff)))
+        bitmap = bytearray(len(FileStorage.__positioned[name]) // 8 + 1)
+        for value, key in column[start:end]:
+            bitmap[positions[key] >> 3] |= 1 << (positions[key] & 7)
+        return int.from_bytes(bitmap, "little")
+
+    def iter_sorted(self, cls, attr, reverse=False, bitmap=None):
+        """yields the objects of cls in the order of their attribute attr,
+        then of their keys, only the ones of bitmap if given. attr must be
+        one of the columns of cls"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        column = self.__column(name, attr)
+        bucket = self.__bucket(name)
+        if bitmap is not None:
+            positions = self.__position(name)
+            bits = bitmap.to_bytes(
+                len(FileStorage.__positioned[name]) // 8 + 1, "little")
+        for value, key in reversed(column) if reverse else iter(column):
+            if bitmap is not None and \
+                    not bits[positions[key] >> 3] >> (positions[key] & 7) & 1:
+                continue
+            yield bucket[key]
+
+    def box_bitmap(self, cls, south, west, north, east):
+        """returns the bitmap of the objects of cls whose point is in the
+        (south, west, north, east) box, west being greater than east when
+        it crosses the antimeridian, in the bit positions of
+        bitmap_objects"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        grid = self.__grid(name)
+        positions = self.__position(name)
+        bitmap = bytearray(len(FileStorage.__positioned[name]) // 8 + 1)
+        for key in grid.box(south, west, north, east):
+            bitmap[positions[key] >> 3] |= 1 << (positions[key] & 7)
+        return int.from_bytes(bitmap, "little")
+
+    def iter_nearest(self, cls, latitude, longitude, bitmap=None):
+        """yields the (distance in kilometers, object) of the objects of cls
+        with a point in the order of their distance to a point, then of
+        their keys, only the ones of bitmap if given"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        grid = self.__grid(name)
+        bucket = self.__bucket(name)
+        accept = None
+        if bitmap is not None:
+            positions = self.__position(name)
+            bits = bitmap.to_bytes(
+                len(FileStorage.__positioned[name]) // 8 + 1, "little")
+
+            def accept(key):
+                """returns whether key is one of an object of bitmap"""
+                return bits[positions[key] >> 3] >> (positions[key] & 7) & 1
+        for far, key in grid.nearest(latitude, longitude, accept):
+            yield far, bucket[key]
+
+    def text_search(self, cls, query, limit=None, bitmap=None):
+        """returns the (BM25 score, object) of the objects of cls whose
+        document of the full-text index holds a word of query, the best
+        first then in the order of their keys, only the limit first ones if
+        given and the ones of bitmap if given"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        if FileStorage.__text is None:
+            for text_class in text_attributes:
+                self.__build(FileStorage.__raw.get(text_class, ()))
+            FileStorage.__text = TextIndex()
+            for text_class in text_attributes:
+                if text_class not in text_parents:
+                    for key in self.__bucket(text_class):
+                        self.__text_update(text_class,
+                                           key.partition(".")[2])
+        prefix = name + "."
+        if bitmap is None:
+            def accept(key):
+                """returns whether key is one of an object of cls"""
+                return key.startswith(prefix)
+        else:
+            positions = self.__position(name)
+            bits = bitmap.to_bytes(
+                len(FileStorage.__positioned[name]) // 8 + 1, "little")
+
+            def accept(key):
+                """returns whether key is one of an object of bitmap"""
+                return key in positions and \
+                    bits[positions[key] >> 3] >> (positions[key] & 7) & 1
+        bucket = self.__bucket(name)
+        return [(score, bucket[key]) for score, key
+                in FileStorage.__text.search(query, limit, accept)]
+
+    def prefix_search(self, cls, attr, prefix, limit=None):
+        """returns the objects of cls whose attribute attr starts with
+        prefix, ignoring case, in the order of attr then of their keys, at
+        most limit. attr must be one of the columns of cls"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        column = self.__column(name, attr)
+        bucket = self.__bucket(name)
+        prefix = str(prefix).casefold()
+        objs = []
+        i = bisect_left(column, ((1, prefix),))
+        while i < len(column) and column[i][0][1].startswith(prefix) and \
+                (limit is None or len(objs) < limit):
+            objs.append(bucket[column[i][1]])
+            i += 1
+        return objs
+
+    def bitmap_objects(self, cls, bitmap):
+        """returns the objects of cls whose bit is set in a bitmap of
+        lookup_bitmap"""
+        name = cls if type(cls) is str else cls.__name__
+        positioned = FileStorage.__positioned.get(name, [])
+        bits = bin(bitmap)[:1:-1]
+        objs = []
+        i = bits.find("1")
+        while i != -1:
+            objs.append(positioned[i])
+            i = bits.find("1", i + 1)
+        return objs
+
+    def page(self, cls, limit=None, after=None, attr=None, value=None):
+        """returns the objects of cls in the order of their ids, from the
+        first id greater than after, at most limit. If attr is given, only
+        the ones whose attr equals value"""
+        self.__sync()
+        name = cls if type(cls) is str else cls.__name__
+        if attr is not None:
+            objs = [obj for obj in self.lookup(name, attr, value)
+                    if after is None or obj.id > after]
+            if limit is None:
+                return sorted(objs, key=lambda obj: obj.id)
+            return heapq.nsmallest(limit, objs, key=lambda obj: obj.id)
+        ids = FileStorage.__sorted.get(name)
+        if ids is None:
+            ids = sorted(key.partition(".")[2] for key in
+                         self.__bucket(name).keys() |
+                         FileStorage.__raw.get(name, {}).keys())
+            FileStorage.__sorted[name] = ids
+        i = 0 if after is None else bisect_right(ids, after)
+        objs = []
+        while i < len(ids) and (limit is None or len(objs) < limit):
+            key = name + "." + ids[i]
+            self.__build((key,))
+            if key in self.__bucket(name):
+                objs.append(self.__objects[key])
+                i += 1
+            else:
+                del ids[i]
+        return objs
+
     def count(self, cls=None):
         """counts the number of objects of storage, or of class if provided"""
-        return len(self.all(cls))
+        self.__sync()
+        if cls is not None:
+            name = cls if type(cls) is str else cls.__name__
+            return len(self.__bucket(name)) + \
+                len(FileStorage.__raw.get(name, ()))
+        return len(self.__objects) + \
+            sum(map(len, FileStorage.__raw.values()))
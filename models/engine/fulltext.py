@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""
+Contains the full-text index the keyword searches of the places are made
+with: an inverted index of their name, description and reviews, scored
+with BM25
+"""
+
+from collections import Counter
+import heapq
+from math import log
+import re
+
+# attributes whose text is indexed, by class name
+text_attributes = {"Place": ("name", "description"), "Review": ("text",)}
+# (class name, foreign key) of the object whose document holds the text of
+# an object, by class name. The objects of the other classes of
+# text_attributes are documents themselves
+text_parents = {"Review": ("Place", "place_id")}
+# words too common to be indexed: the default stopwords of the full-text
+# indexes of MySQL
+stopwords = frozenset("a about an are as at be by com de en for from how i "
+                      "in is it la of on or that the this to was what when "
+                      "where who will with und www".split())
+# pattern of the words of a text
+word_pattern = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """returns the lowercase words of a text but its stopwords"""
+    return [word for word in word_pattern.findall(str(text).lower())
+            if word not in stopwords]
+
+
+class TextIndex:
+    """inverted index of documents by their words, scored with BM25"""
+    # float - saturation of the frequency of a word in a document
+    k1 = 1.2
+    # float - weight of the length of a document against the average
+    b = 0.75
+
+    def __init__(self):
+        """Instantiate a TextIndex object"""
+        # dictionary - word -> {document: number of times it holds word}
+        self.postings = {}
+        # dictionary - document -> {word: number of times it holds word}
+        self.words = {}
+        # dictionary - document -> its number of words
+        self.lengths = {}
+        # integer - number of words of every document
+        self.total = 0
+
+    def add(self, doc, texts):
+        """indexes the document doc, replacing its previous texts"""
+        self.remove(doc)
+        counts = Counter(tokenize(" ".join(map(str, texts))))
+        postings = self.postings
+        for word, count in counts.items():
+            if word in postings:
+                postings[word][doc] = count
+            else:
+                postings[word] = {doc: count}
+        self.words[doc] = counts
+        self.lengths[doc] = sum(counts.values())
+        self.total += self.lengths[doc]
+
+    def remove(self, doc):
+        """forgets the document doc if indexed"""
+        if doc not in self.words:
+            return
+        for word in self.words.pop(doc):
+            del self.postings[word][doc]
+            if not self.postings[word]:
+                del self.postings[word]
+        self.total -= self.lengths.pop(doc)
+
+    def scores(self, query, limit=None, accept=None):
+        """returns {document: BM25 score} of the documents holding a word
+        of query, only the ones accept returns True for if given. The
+        words are scored from the rarest: with limit, once no document
+        left out can be among the limit best ones with the words left,
+        only the documents found so far are scored with them"""
+        lengths = self.lengths
+        base = self.k1 * (1 - self.b)
+        slope = self.k1 * self.b / (self.total / len(lengths or (0,)) or 1)
+        words = sorted((self.postings[word] for word in set(tokenize(query))
+                        if word in self.postings), key=len)
+        weights = [(self.k1 + 1) * log(1 + (len(lengths) - len(docs) + 0.5) /
+                                       (len(docs) + 0.5)) for docs in words]
+        scores = {}
+        for i, docs in enumerate(words):
+            if accept is not None:
+                scores = {doc: score for doc, score in scores.items()
+                          if accept(doc)}
+            if limit is not None and len(scores) >= limit and \
+                    heapq.nlargest(limit, scores.values())[-1] > \
+                    sum(weights[i:]) + 1e-9:
+                for docs, weight in zip(words[i:], weights[i:]):
+                    for doc in scores:
+                        count = docs.get(doc)
+                        if count:
+                            scores[doc] += weight * count / \
+                                (count + base + slope * lengths[doc])
+                return scores
+            word_scores = {doc: weights[i] * count /
+                           (count + base + slope * lengths[doc])
+                           for doc, count in docs.items()}
+            if len(word_scores) > len(scores):
+                scores, word_scores = word_scores, scores
+            scores.update({doc: score + scores.get(doc, 0)
+                           for doc, score in word_scores.items()})
+        if accept is not None:
+            scores = {doc: score for doc, score in scores.items()
+                      if accept(doc)}
+        return scores
+
+    def search(self, query, limit=None, accept=None):
+        """returns the (score, document) of the documents holding a word of
+        query, the best first then in the order of the documents, only the
+        limit first ones if given and the ones accept returns True for.
+        Scores equal to 9 decimals are ties"""
+        scores = self.scores(query, limit, accept)
+        if limit is not None and len(scores) > limit:
+            least = heapq.nlargest(limit, scores.values())[-1] - 1e-9
+            scores = {doc: score for doc, score in scores.items()
+                      if score >= least}
+        found = sorted(scores.items(),
+                       key=lambda item: (-round(item[1], 9), item[0]))
+        return [(score, doc) for doc, score in found[:limit]]
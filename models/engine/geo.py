@@ -0,0 +1,216 @@
+#!/usr/bin/python3
+"""
+Contains the distances on the earth and the grids the geographic searches
+of the places are made with
+"""
+
+import heapq
+from math import asin, cos, degrees, floor, inf, radians, sin, sqrt
+
+# float - mean radius of the earth in kilometers
+earth_radius = 6371.0
+
+
+def valid_point(latitude, longitude):
+    """returns whether latitude and longitude are the numbers of a point"""
+    return type(latitude) in (int, float) and \
+        type(longitude) in (int, float) and \
+        -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def distance(latitude, longitude, other_latitude, other_longitude):
+    """returns the great-circle distance in kilometers between two points
+    in degrees"""
+    latitude, other_latitude = radians(latitude), radians(other_latitude)
+    half = sin((other_latitude - latitude) / 2) ** 2 + \
+        cos(latitude) * cos(other_latitude) * \
+        sin(radians(other_longitude - longitude) / 2) ** 2
+    return 2 * earth_radius * asin(min(1.0, sqrt(half)))
+
+
+def bounding_box(latitude, longitude, radius):
+    """returns the (south, west, north, east) box in degrees holding the
+    points at most radius kilometers away from a point. west is greater
+    than east when the box crosses the antimeridian"""
+    angle = radius / earth_radius
+    south = latitude - degrees(angle)
+    north = latitude + degrees(angle)
+    if south <= -90 or north >= 90 or \
+            sin(angle) >= cos(radians(latitude)):
+        return (max(south, -90.0), -180.0, min(north, 90.0), 180.0)
+    width = degrees(asin(sin(angle) / cos(radians(latitude))))
+    if width >= 180:
+        return (south, -180.0, north, 180.0)
+    west, east = longitude - width, longitude + width
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return (south, west, north, east)
+
+
+def in_box(latitude, longitude, south, west, north, east):
+    """returns whether a point is in a (south, west, north, east) box"""
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
+
+
+class Grid:
+    """nested grids of the points of documents, from the coarsest to the
+    finest, for the box and nearest searches"""
+    # tuple - size in degrees of the cells of each grid, each dividing the
+    # previous one
+    cell_sizes = (1.0, 0.2, 0.04, 0.008)
+
+    def __init__(self):
+        """Instantiate a Grid object"""
+        # list - the grids: {(row, column): set of its cells in the next
+        # grid}, then for the finest {(row, column): {document: (latitude,
+        # longitude)}}
+        self.grids = [{} for size in self.cell_sizes]
+        # dictionary - document -> its cell in the finest grid
+        self.cells = {}
+
+    def cell(self, latitude, longitude, level=-1):
+        """returns the (row, column) of the cell of a point in a grid"""
+        size = self.cell_sizes[level]
+        return (min(floor((latitude + 90) / size), round(180 / size) - 1),
+                min(floor((longitude + 180) / size), round(360 / size) - 1))
+
+    def cell_distance(self, latitude, longitude, cell, level):
+        """returns a lower bound of the distance in kilometers between a
+        point and the points of a cell of a grid"""
+        size = self.cell_sizes[level]
+        south, west = cell[0] * size - 90, cell[1] * size - 180
+        across = max(south - latitude, latitude - south - size, 0)
+        along = 0 if west <= longitude <= west + size else \
+            min((west - longitude) % 360, (longitude - west - size) % 360, 90)
+        return earth_radius * max(radians(across), asin(
+            cos(radians(latitude)) * sin(radians(along)))) - 1e-9
+
+    def add(self, doc, latitude, longitude):
+        """puts the document doc at a point, replacing its previous one"""
+        self.remove(doc)
+        grids = self.grids
+        cell = self.cell(latitude, longitude)
+        grids[-1].setdefault(cell, {})[doc] = (latitude, longitude)
+        self.cells[doc] = cell
+        for level in range(len(grids) - 2, -1, -1):
+            ratio = round(self.cell_sizes[level] /
+                          self.cell_sizes[level + 1])
+            parent = (cell[0] // ratio, cell[1] // ratio)
+            if cell in grids[level].setdefault(parent, set()):
+                break
+            grids[level][parent].add(cell)
+            cell = parent
+
+    def remove(self, doc):
+        """forgets the point of the document doc if any"""
+        if doc not in self.cells:
+            return
+        grids = self.grids
+        cell = self.cells.pop(doc)
+        del grids[-1][cell][doc]
+        level = len(grids) - 1
+        while level >= 0 and not grids[level][cell]:
+            del grids[level][cell]
+            if level:
+                ratio = round(self.cell_sizes[level - 1] /
+                              self.cell_sizes[level])
+                parent = (cell[0] // ratio, cell[1] // ratio)
+                grids[level - 1][parent].discard(cell)
+                cell = parent
+            level -= 1
+
+    def box(self, south, west, north, east):
+        """returns the documents whose point is in the (south, west, north,
+        east) box, west being greater than east when it crosses the
+        antimeridian. The grids are walked down from the coarse cells
+        overlapping the box"""
+        grids = self.grids
+        cells = None
+        for level, grid in enumerate(grids):
+            columns_count = round(360 / self.cell_sizes[level])
+            top, left = self.cell(south, west, level)
+            bottom, right = self.cell(north, east, level)
+            if west > east:
+                right += columns_count
+            if cells is None and \
+                    (bottom - top + 1) * (right - left + 1) <= len(grid):
+                cells = [(row, column % columns_count)
+                         for row in range(top, bottom + 1)
+                         for column in range(left, right + 1)]
+                cells = [cell for cell in cells if cell in grid]
+                continue
+            if cells is None:
+                cells = grid
+            elif level:
+                cells = [child for cell in cells
+                         for child in grids[level - 1][cell]]
+            cells = [cell for cell in cells if top <= cell[0] <= bottom and
+                     (cell[1] - left) % columns_count <= right - left]
+        return [doc for cell in cells
+                for doc, point in grids[-1][cell].items()
+                if in_box(*point, south, west, north, east)]
+
+    def nearest(self, latitude, longitude, accept=None):
+        """yields the (distance in kilometers, document) of the documents in
+        the order of their distance to a point, then of the documents, only
+        the ones accept returns True for if given. The coarse cells are
+        visited by rings around the point, and the cells, then the
+        documents, taken from a heap by their least possible distance"""
+        grids = self.grids
+        size = self.cell_sizes[0]
+        rows_count, columns_count = round(180 / size), round(360 / size)
+        row, column = self.cell(latitude, longitude, 0)
+        heap, visited, ring = [], set(), 0
+        while True:
+            if 8 * ring > len(grids[0]) - len(visited):
+                cells = [cell for cell in grids[0] if cell not in visited]
+                bound = inf
+            else:
+                edges = {-ring, ring}
+                cells = [(row + i, (column + j) % columns_count)
+                         for i in range(-ring, ring + 1)
+                         if 0 <= row + i < rows_count
+                         for j in (range(-ring, ring + 1) if i in edges
+                                   else edges)]
+                south = (row - ring) * size - 90
+                north = (row + ring + 1) * size - 90
+                west = (column - ring) * size - 180
+                east = (column + ring + 1) * size - 180
+                across = min(latitude - south if south > -90 else inf,
+                             north - latitude if north < 90 else inf)
+                along = min(longitude - west, east - longitude) \
+                    if (2 * ring + 1) * size < 360 else inf
+                bound = earth_radius * radians(across) - 1e-9
+                if along < inf:
+                    along = radians(min(along, 90))
+                    bound = min(bound, earth_radius * asin(
+                        cos(radians(latitude)) * sin(along)) - 1e-9)
+            for cell in cells:
+                if cell in grids[0] and cell not in visited:
+                    visited.add(cell)
+                    heapq.heappush(heap, (self.cell_distance(
+                        latitude, longitude, cell, 0), 0, 0, cell))
+            while heap and heap[0][0] < bound:
+                entry = heapq.heappop(heap)
+                if entry[1]:
+                    yield entry[0], entry[2]
+                elif entry[2] < len(grids) - 1:
+                    level = entry[2] + 1
+                    for cell in grids[level - 1].get(entry[3], ()):
+                        heapq.heappush(heap, (self.cell_distance(
+                            latitude, longitude, cell, level), 0, level,
+                            cell))
+                else:
+                    for doc, point in grids[-1].get(entry[3], {}).items():
+                        if accept is None or accept(doc):
+                            heapq.heappush(heap, (distance(
+                                latitude, longitude, *point), 1, doc))
+            if bound == inf:
+                return
+            ring += 1
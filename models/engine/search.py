@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""
+Contains the search engine of the places: set operations on the storage
+indexes in file storage, a single SQL query in database storage, and the
+full-text index of the storage for the keywords
+"""
+
+import heapq
+from itertools import islice, takewhile
+import models
+from models.city import City
+from models.engine.geo import bounding_box, distance, earth_radius
+from models.place import Place
+
+# numeric attributes of the places the searches can filter and sort on
+range_attributes = ("number_rooms", "number_bathrooms", "max_guest",
+                    "price_by_night")
+
+
+def search_places(states=None, cities=None, amenities=None, ranges=None,
+                  sort=None, limit=None, box=None, near=None, q=None):
+    """returns the places that are in one of the states or one of the
+    cities if any is given, that have every amenity of amenities and
+    whose attributes are in the (low, high) ranges of ranges, a bound being
+    None when open. With box, only the ones in the (south, west, north,
+    east) box, with near, a (latitude, longitude, radius) whose radius
+    in kilometers may be None, only the ones at most radius away, and with
+    q, only the ones whose name, description or reviews hold a word of q.
+    They are in the order of the attribute sort, descending if prefixed by
+    "-", then of their ids, or else of their relevance to q, or else of
+    their distance to near, or else of their ids. Only the limit first ones
+    are returned if limit is given"""
+    if models.storage_t == "db":
+        return _db_places(states, cities, amenities, ranges, sort, limit,
+                          box, near, q)
+    return _file_places(states, cities, amenities, ranges, sort, limit,
+                        box, near, q)
+
+
+def _file_places(states, cities, amenities, ranges, sort, limit, box,
+                 near, q):
+    """searches the places with the bitmaps of the file storage: the
+    places of the cities, and of the cities of the states, are or'ed and
+    the places of each amenity, range and box are and'ed. A sort walks
+    the sorted column of its attribute, and near the grid of the places
+    around its point, until limit places are found. q ranks the places of
+    the bitmap with the full-text index"""
+    storage = models.storage
+    bitmap = None
+    if states or cities:
+        city_ids = set(cities or ())
+        for state_id in set(states or ()):
+            city_ids.update(city.id for city in
+                            storage.lookup(City, "state_id", state_id))
+        bitmap = 0
+        for city_id in city_ids:
+            bitmap |= storage.lookup_bitmap(Place, "city_id", city_id)
+    for amenity_id in set(amenities or ()):
+        amenity_bitmap = storage.lookup_bitmap(Place, "amenity_ids",
+                                               amenity_id)
+        bitmap = amenity_bitmap if bitmap is None else bitmap & amenity_bitmap
+    for attr, (low, high) in (ranges or {}).items():
+        range_bitmap = storage.range_bitmap(Place, attr, low, high)
+        bitmap = range_bitmap if bitmap is None else bitmap & range_bitmap
+    within = near and near[2] is not None and (sort or q)
+    boxes = [box] if box else []
+    if within:
+        boxes.append(bounding_box(*near))
+    for box in boxes:
+        box_bitmap = storage.box_bitmap(Place, *box)
+        bitmap = box_bitmap if bitmap is None else bitmap & box_bitmap
+    if sort or q:
+        if sort:
+            places = storage.iter_sorted(Place, sort.lstrip("-"),
+                                         sort.startswith("-"), bitmap)
+            if q:
+                found = {id(place) for score, place
+                         in storage.text_search(Place, q, None, bitmap)}
+                places = (place for place in places if id(place) in found)
+        else:
+            places = (place for score, place in storage.text_search(
+                Place, q, None if within else limit, bitmap))
+        if within:
+            places = (place for place in places
+                      if distance(near[0], near[1], place.latitude,
+                                  place.longitude) <= near[2])
+        return list(islice(places, limit))
+    if near:
+        nearest = storage.iter_nearest(Place, near[0], near[1], bitmap)
+        if near[2] is not None:
+            nearest = takewhile(lambda found: found[0] <= near[2], nearest)
+        return [place for far, place in islice(nearest, limit)]
+    if bitmap is None:
+        if limit is not None:
+            return storage.page(Place, limit)
+        places = storage.all(Place).values()
+    else:
+        places = storage.bitmap_objects(Place, bitmap)
+    if limit is not None:
+        return heapq.nsmallest(limit, places, key=lambda place: place.id)
+    return sorted(places, key=lambda place: place.id)
+
+
+def _db_places(states, cities, amenities, ranges, sort, limit, box, near,
+               q):
+    """searches the places with a single query joining the cities and
+    grouping the place_amenity rows, sorted and limited by the database.
+    q restricts it to the ids found by the full-text index, and ranks the
+    ids it returns"""
+    from models.place import place_amenity
+    from sqlalchemy import func, or_
+
+    query = models.storage.query(Place)
+    if states or cities:
+        filters = []
+        if cities:
+            filters.append(Place.city_id.in_(set(cities)))
+        if states:
+            query = query.join(City, Place.city_id == City.id)
+            filters.append(City.state_id.in_(set(states)))
+        query = query.filter(or_(*filters))
+    if amenities:
+        amenities = set(amenities)
+        query = query.filter(Place.id.in_(
+            models.storage.query(place_amenity.c.place_id)
+            .filter(place_amenity.c.amenity_id.in_(amenities))
+            .group_by(place_amenity.c.place_id)
+            .having(func.count(place_amenity.c.amenity_id) ==
+                    len(amenities))))
+    for attr, (low, high) in (ranges or {}).items():
+        if low is not None:
+            query = query.filter(getattr(Place, attr) >= low)
+        if high is not None:
+            query = query.filter(getattr(Place, attr) <= high)
+    if box:
+        query = query.filter(*_db_box(box))
+    if near:
+        far = _db_distance(near[0], near[1])
+        query = query.filter(Place.latitude.isnot(None),
+                             Place.longitude.isnot(None))
+        if near[2] is not None:
+            query = query.filter(*_db_box(bounding_box(*near)))
+            query = query.filter(far <= near[2])
+    if q:
+        scores = models.storage.text_scores(Place, q)
+        if not scores:
+            return []
+        query = query.filter(Place.id.in_(scores))
+        if not sort:
+            ids = [id for id, in query.with_entities(Place.id)]
+            ids = heapq.nsmallest(len(ids) if limit is None else limit, ids,
+                                  key=lambda id: (-round(scores[id], 9), id))
+            return models.storage.get_many(Place, ids)
+    if sort and sort.startswith("-"):
+        query = query.order_by(getattr(Place, sort[1:]).desc(),
+                               Place.id.desc())
+    elif sort:
+        query = query.order_by(getattr(Place, sort), Place.id)
+    elif near:
+        query = query.order_by(far, Place.id)
+    else:
+        query = query.order_by(Place.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _db_box(box):
+    """returns the filters of the places in a (south, west, north, east)
+    box, bounding the latitude first for the index of the places"""
+    from sqlalchemy import or_
+
+    south, west, north, east = box
+    if west <= east:
+        return (Place.latitude.between(south, north),
+                Place.longitude.between(west, east))
+    return (Place.latitude.between(south, north),
+            or_(Place.longitude >= west, Place.longitude <= east))
+
+
+def _db_distance(latitude, longitude):
+    """returns the SQL expression of the distance in kilometers of the
+    places to a point, the haversine formula of distance"""
+    from math import cos, radians
+    from sqlalchemy import func
+
+    half = func.power(func.sin((func.radians(Place.latitude) -
+                                radians(latitude)) / 2), 2) + \
+        cos(radians(latitude)) * func.cos(func.radians(Place.latitude)) * \
+        func.power(func.sin(func.radians(Place.longitude - longitude) / 2),
+                   2)
+    return 2 * earth_radius * func.asin(func.least(1, func.sqrt(half)))
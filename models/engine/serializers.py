@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+"""
+Contains the serializers FileStorage can write its file with, and a
+converter between their formats
+"""
+
+from datetime import datetime
+import json
+import pickle
+import sys
+import time
+
+# format of the dates of the records of the text formats, the one of
+# BaseModel.to_dict
+date_format = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def encode_date(value):
+    """returns the string of a datetime value of a record, for the formats
+    without dates"""
+    if type(value) is datetime:
+        return value.strftime(date_format)
+    raise TypeError("{!r} is not serializable".format(value))
+
+
+def iter_json_object(f, size=1 << 16):
+    """yields the (key, value) pairs of the JSON object in the file f one at
+    a time, reading it by chunks of size characters"""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+
+    def fill():
+        """appends a chunk to the buffer, False at the end of the file"""
+        nonlocal buf, pos
+        chunk = f.read(size)
+        if chunk == "":
+            return False
+        buf, pos = buf[pos:] + chunk, 0
+        return True
+
+    def peek():
+        """returns the next character that is not a whitespace"""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("Unexpected end of JSON file")
+
+    def expect(chars):
+        """consumes the next character, which must be one of chars"""
+        nonlocal pos
+        char = peek()
+        if char not in chars:
+            raise ValueError("Expecting one of {} at {!r}".format(chars, char))
+        pos += 1
+        return char
+
+    def value():
+        """decodes the next JSON value"""
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or not fill():
+                    pos = end
+                    return obj
+            except ValueError:
+                if not fill():
+                    raise
+
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        key = value()
+        expect(":")
+        yield key, value()
+        if expect(",}") == "}":
+            return
+
+
+class JSONSerializer:
+    """writes the records as one JSON object, the file.json format"""
+    extension = "json"
+    binary = False
+
+    def dump(self, records, f):
+        """writes the dictionary of records to the file f"""
+        json.dump(records, f, default=encode_date)
+
+    def load(self, f):
+        """yields the (key, record) pairs of the file f one at a time"""
+        return iter_json_object(f)
+
+
+class PickleSerializer:
+    """writes the records as pickled batches of (key, record) pairs, their
+    dates as datetime objects so that they are not parsed once loaded. The
+    records hold no large binary data for out-of-band buffers to spare a
+    copy of. Only load files this application wrote: unpickling runs
+    code"""
+    extension = "pickle"
+    binary = True
+    batch = 1000
+    # attributes of the records pickled as datetime objects
+    dates = ("created_at", "updated_at")
+
+    def dump(self, records, f):
+        """writes the dictionary of records to the file f"""
+        batch = []
+        for key, record in records.items():
+            for attr in self.dates:
+                if type(record.get(attr)) is str:
+                    try:
+                        date = datetime.fromisoformat(record[attr])
+                    except ValueError:
+                        continue
+                    record = dict(record)
+                    record[attr] = date
+            batch.append((key, record))
+            if len(batch) == self.batch:
+                pickle.dump(batch, f, protocol=5)
+                batch = []
+        if batch:
+            pickle.dump(batch, f, protocol=5)
+
+    def load(self, f):
+        """yields the (key, record) pairs of the file f one batch at a
+        time"""
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+class MsgpackSerializer:
+    """writes the records as a stream of msgpack (key, record) pairs, needs
+    the msgpack package"""
+    extension = "msgpack"
+    binary = True
+
+    def dump(self, records, f):
+        """writes the dictionary of records to the file f"""
+        import msgpack
+        packer = msgpack.Packer(use_bin_type=True, default=encode_date)
+        for item in records.items():
+            f.write(packer.pack(item))
+
+    def load(self, f):
+        """yields the (key, record) pairs of the file f one at a time"""
+        import msgpack
+        for key, record in msgpack.Unpacker(f, raw=False):
+            yield key, record
+
+
+serializers = {"json": JSONSerializer(), "pickle": PickleSerializer(),
+               "msgpack": MsgpackSerializer()}
+
+
+def serializer_named(name):
+    """returns the serializer of a format name"""
+    if name not in serializers:
+        raise ValueError("Unknown file format: {}".format(name))
+    return serializers[name]
+
+
+def serializer_of(path):
+    """returns the serializer of a file from its extension"""
+    extension = path.rpartition(".")[2]
+    for serializer in serializers.values():
+        if serializer.extension == extension:
+            return serializer
+    raise ValueError("Unknown file format: {}".format(path))
+
+
+def convert(src, dst):
+    """converts the file src to dst, in the formats of their extensions.
+    Returns the number of records, and the load and dump times"""
+    load, dump = serializer_of(src), serializer_of(dst)
+    start = time.perf_counter()
+    with open(src, 'rb' if load.binary else 'r') as f:
+        records = dict(load.load(f))
+    loaded = time.perf_counter()
+    with open(dst, 'wb' if dump.binary else 'w') as f:
+        dump.dump(records, f)
+    return len(records), loaded - start, time.perf_counter() - loaded
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source file> <destination file>".format(
+            sys.argv[0]))
+        sys.exit(1)
+    count, load_time, dump_time = convert(sys.argv[1], sys.argv[2])
+    print("{} records: load {:.3f}s, dump {:.3f}s".format(
+        count, load_time, dump_time))
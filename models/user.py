@@ -32,8 +32,21 @@ class User(BaseModel, Base):
         if name == "password":
             hash_pass = md5(value.encode('utf-8'))
             value = hash_pass.hexdigest()
-        self.__dict__[name] = value
+        super().__setattr__(name, value)
 
     def __init__(self, *args, **kwargs):
         """initializes user"""
         super().__init__(*args, **kwargs)
+
+    if models.storage_t != 'db':
+        @property
+        def places(self):
+            """getter for list of place instances owned by the user"""
+            from models.place import Place
+            return models.storage.lookup(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter for list of review instances written by the user"""
+            from models.review import Review
+            return models.storage.lookup(Review, "user_id", self.id)
@@ -19,6 +19,9 @@ import os
 import pep8
 import unittest
 import random
+import sqlite3
+import threading
+import uuid
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
@@ -138,3 +141,184 @@ class TestFileStorage(unittest.TestCase):
         # Test correct count for all objects
         total_count = len(models.storage.all())
         self.assertEqual(total_count, models.storage.count())
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_many(self):
+        """Test that get_many returns the objects found in the ids order"""
+        first = State(name="Alabama")
+        second = State(name="Alaska")
+        models.storage.new(first)
+        models.storage.new(second)
+        models.storage.save()
+        self.assertEqual(models.storage.get_many(State, [second.id, "nope",
+                                                         first.id]),
+                         [second, first])
+        self.assertEqual(models.storage.get_many(State, []), [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_load(self):
+        """Test that the relationship paths of load are loaded eagerly"""
+        state = State(name="Arizona")
+        models.storage.new(state)
+        models.storage.new(City(name="Phoenix", state_id=state.id))
+        models.storage.save()
+        models.storage.close()
+        state = models.storage.get(State, state.id, load=["cities.places"])
+        self.assertIn("cities", state.__dict__)
+        self.assertIn("places", state.cities[0].__dict__)
+        self.assertNotIn("cities", state.to_dict())
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_iter_all(self):
+        """Test that iter_all yields the pairs all returns"""
+        models.storage.new(State(name="Arkansas"))
+        models.storage.save()
+        self.assertEqual(dict(models.storage.iter_all()),
+                         models.storage.all())
+        self.assertEqual(dict(models.storage.iter_all(State)),
+                         models.storage.all(State))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_pool_stats(self):
+        """Test that pool_stats reports the connection pool state"""
+        models.storage.all(State)
+        stats = models.storage.pool_stats()
+        self.assertEqual(stats["size"],
+                         int(os.getenv('HBNB_MYSQL_POOL_SIZE', 5)))
+        self.assertGreater(stats["checkouts"], 0)
+        self.assertGreaterEqual(stats["wait_max_ms"], stats["wait_avg_ms"])
+
+    def test_pool_wait_stats_threads(self):
+        """Test that the checkouts of concurrent threads are all counted"""
+        pool = db_storage.TimedQueuePool(
+            lambda: sqlite3.connect(":memory:", check_same_thread=False),
+            pool_size=4, max_overflow=0)
+
+        def checkout():
+            """checks connections out and in"""
+            for i in range(200):
+                pool.connect().close()
+        threads = [threading.Thread(target=checkout) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        checkouts, wait_total, wait_max = pool.wait_stats()
+        self.assertEqual(checkouts, 1600)
+        self.assertGreaterEqual(wait_total, wait_max)
+        pool.dispose()
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_read_after_write(self):
+        """Test that a request reads its own writes"""
+        state = State(name="Oregon")
+        state.save()
+        self.assertIs(models.storage.get(State, state.id), state)
+        self.assertEqual(models.storage.all(State)["State." + state.id],
+                         state)
+
+    @unittest.skipIf(models.storage_t != 'db' or
+                     not os.getenv('HBNB_MYSQL_READ_HOST'),
+                     "not testing db storage with a read replica")
+    def test_read_routing(self):
+        """Test that reads go to the replica until the session writes"""
+        storage = models.storage
+        storage.close()
+        session = storage._DBStorage__session
+        self.assertIs(session.get_bind(), storage._DBStorage__read_engine)
+        storage.new(State(name="Idaho"))
+        self.assertIs(session.get_bind(), storage._DBStorage__engine)
+        storage.save()
+        self.assertIs(session.get_bind(), storage._DBStorage__engine)
+        storage.close()
+        self.assertIs(session.get_bind(), storage._DBStorage__read_engine)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_save(self):
+        """Test that bulk_new and bulk_save store objects"""
+        states = [State(name=str(i)) for i in range(5)]
+        models.storage.bulk_new(states)
+        models.storage.bulk_save()
+        models.storage.close()
+        for state in states:
+            self.assertEqual(models.storage.get(State, state.id).name,
+                             state.name)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_transaction_rollback(self):
+        """Test that a transaction raising rolls the session back"""
+        state = State(name="California")
+        state.save()
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                state.name = "Nevada"
+                models.storage.new(State(name="Utah"))
+                models.storage.save()
+                raise ValueError
+        self.assertEqual(state.name, "California")
+        self.assertEqual([s.name for s in models.storage.all(State).values()
+                          if s.name == "Utah"], [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_page(self):
+        """Test that page returns the objects after an id in id order"""
+        state = State(name="California")
+        models.storage.new(state)
+        cities = [City(name=str(i), state_id=state.id) for i in range(3)]
+        for city in cities:
+            models.storage.new(city)
+        models.storage.save()
+        cities.sort(key=lambda city: city.id)
+        self.assertEqual(models.storage.page(City, 2, None, "state_id",
+                                             state.id), cities[:2])
+        self.assertEqual(models.storage.page(City, 2, cities[1].id,
+                                             "state_id", state.id),
+                         cities[2:])
+        ids = [s.id for s in models.storage.page(State, 2)]
+        self.assertEqual(ids, sorted(s.id for s in
+                                     models.storage.all(State).values())[:2])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_prefix_search(self):
+        """Test that prefix_search returns the names starting with a
+        prefix in name order"""
+        prefix = "Zz" + uuid.uuid4().hex
+        states = [State(name=prefix + name) for name in ("b", "a", "_c")]
+        for state in states:
+            models.storage.new(state)
+        models.storage.save()
+        self.assertEqual(models.storage.prefix_search(State, "name", prefix),
+                         [states[2], states[1], states[0]])
+        self.assertEqual(models.storage.prefix_search(State, "name",
+                                                      prefix + "a"),
+                         [states[1]])
+        self.assertEqual(models.storage.prefix_search(State, "name",
+                                                      prefix + "_", 1),
+                         [states[2]])
+        self.assertEqual(models.storage.prefix_search(State, "name",
+                                                      prefix + "%"), [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_text_scores_late_commit(self):
+        """Test that text_scores finds the text of a row committed after a
+        row with a later updated_at"""
+        from datetime import timedelta
+        words = ["w" + uuid.uuid4().hex for i in range(3)]
+        state = State(name="California")
+        city = City(name="Fresno", state_id=state.id)
+        user = User(email="a@b.c", password="pwd")
+        places = [Place(name=word, city_id=city.id, user_id=user.id)
+                  for word in words[:2]]
+        for obj in [state, city, user] + places:
+            models.storage.new(obj)
+        models.storage.save()
+        self.assertEqual(list(models.storage.text_scores(Place, words[0])),
+                         [places[0].id])
+        places[1].updated_at = datetime.utcnow() + timedelta(seconds=5)
+        models.storage.save()
+        self.assertEqual(models.storage.text_scores(Place, words[2]), {})
+        places[0].name = words[2]
+        places[0].updated_at = datetime.utcnow()
+        models.storage.save()
+        self.assertEqual(list(models.storage.text_scores(Place, words[2])),
+                         [places[0].id])
@@ -19,6 +19,7 @@ import os
 import pep8
 import unittest
 import random
+import time
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -161,3 +162,721 @@ class TestFileStorage(unittest.TestCase):
         # Test correct count for all objects
         total_count = len(FileStorage._FileStorage__objects)
         self.assertEqual(total_count, storage.count())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_by_class(self):
+        """Test that all with a class only returns objects of that class"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        self.assertEqual(storage.all(State), {"State." + state.id: state})
+        self.assertEqual(storage.all("City"), {"City." + city.id: city})
+        self.assertEqual(storage.all(User), {})
+        self.assertEqual(len(storage.all()), 2)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_buckets_follow_all(self):
+        """Test that changes made through all() reach the class buckets"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State()
+        storage.new(state)
+        storage.all().pop("State." + state.id)
+        self.assertEqual(storage.count(State), 0)
+        self.assertIs(storage.get(State, state.id), None)
+        storage.all()["State." + state.id] = state
+        self.assertEqual(storage.count(State), 1)
+        self.assertIs(storage.get(State, state.id), state)
+        storage.delete(state)
+        self.assertEqual(storage.all(State), {})
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lookup_follows_foreign_keys(self):
+        """Test that lookup follows new, attribute updates and delete"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state_a = State()
+        state_b = State()
+        city = City(state_id=state_a.id)
+        storage.new(city)
+        self.assertEqual(storage.lookup(City, "state_id", state_a.id), [city])
+        city.state_id = state_b.id
+        self.assertEqual(storage.lookup(City, "state_id", state_a.id), [])
+        self.assertEqual(storage.lookup(City, "state_id", state_b.id), [city])
+        storage.delete(city)
+        self.assertEqual(storage.lookup(City, "state_id", state_b.id), [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lookup_after_reload(self):
+        """Test that reloaded objects are reachable through lookup"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        place = Place()
+        review = Review(place_id=place.id)
+        storage.new(place)
+        storage.new(review)
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        reviews = storage.lookup(Review, "place_id", place.id)
+        self.assertEqual([r.id for r in reviews], [review.id])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_reloads_only_changed_file(self):
+        """Test that close only reloads a file changed by someone else"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="California")
+        storage.new(state)
+        storage.save()
+        storage.close()
+        self.assertIs(storage.get(State, state.id), state)
+        js = {"State." + state.id: dict(state.to_dict(), name="Nevada!")}
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        storage.close()
+        self.assertIsNot(storage.get(State, state.id), state)
+        self.assertEqual(storage.get(State, state.id).name, "Nevada!")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal(self):
+        """Test that journal mode appends changes and reload replays them"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+        try:
+            state = State(name="Texas")
+            city = City(state_id=state.id)
+            storage.new(state)
+            storage.new(city)
+            storage.save()
+            with open("file.json", "r") as f:
+                snapshot = f.read()
+            state.name = "Utah"
+            storage.delete(city)
+            storage.save()
+            with open("file.json", "r") as f:
+                self.assertEqual(f.read(), snapshot)
+            with open("file.json.journal", "r") as f:
+                self.assertEqual(len(f.readlines()), 1)
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Utah")
+            self.assertIs(storage.get(City, city.id), None)
+        finally:
+            FileStorage._FileStorage__journal = False
+            storage.compact()
+        self.assertFalse(os.path.exists("file.json.journal"))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal_torn_append(self):
+        """Test that the saves after a torn append to the journal are kept"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+        try:
+            storage.save()
+            state = State(name="A")
+            storage.new(state)
+            storage.save()
+            with open("file.json.journal", "a") as f:
+                f.write('{"put": {"State.b": {"__class__": "State", "id"')
+            states = [State(name="C"), State(name="D")]
+            for other in states:
+                storage.new(other)
+                storage.save()
+            with open("file.json.journal", "r") as f:
+                self.assertTrue(all(line.endswith("}\n") for line in f))
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual(sorted(s.name for s in storage.all(State)
+                                    .values()), ["A", "C", "D"])
+        finally:
+            FileStorage._FileStorage__journal = False
+            storage.compact()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_journal_compaction(self):
+        """Test that a journal over its size limit is folded into the file"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__journal_limit = 1
+        try:
+            storage.save()
+            state = State(name="Ohio")
+            storage.new(state)
+            storage.save()
+            self.assertFalse(os.path.exists("file.json.journal"))
+            with open("file.json", "r") as f:
+                self.assertIn("State." + state.id, json.load(f))
+        finally:
+            FileStorage._FileStorage__journal = False
+            FileStorage._FileStorage__journal_limit = 1 << 20
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_serializes_changed_objects_only(self):
+        """Test that save only calls to_dict on objects changed since the
+        last save"""
+        from unittest import mock
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        states = [State(name="State{}".format(i)) for i in range(3)]
+        for state in states:
+            storage.new(state)
+        storage.save()
+        with mock.patch.object(State, "to_dict", autospec=True,
+                               side_effect=BaseModel.to_dict) as to_dict:
+            states[1].name = "Oregon"
+            storage.delete(states[2])
+            storage.save()
+            self.assertEqual(to_dict.call_count, 1)
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["State." + states[1].id]["name"], "Oregon")
+        self.assertEqual(js["State." + states[0].id]["name"], "State0")
+        self.assertNotIn("State." + states[2].id, js)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_failed_save_keeps_file(self):
+        """Test that a save failing midway leaves file.json untouched"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="Iowa")
+        storage.new(state)
+        storage.save()
+        with open("file.json", "r") as f:
+            js = f.read()
+        state.capital = object()
+        with self.assertRaises(TypeError):
+            storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(f.read(), js)
+        self.assertEqual([name for name in os.listdir(".")
+                          if name.startswith("file.json.") and
+                          name != "file.json.lock"], [])
+        storage.delete(state)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_fsync_policy(self):
+        """Test that save fsyncs as the fsync policy says"""
+        from unittest import mock
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        try:
+            for policy, calls in (("never", 0), ("always", 4),
+                                  ("batched", 2)):
+                FileStorage._FileStorage__fsync = policy
+                FileStorage._FileStorage__fsynced = 0.0
+                with mock.patch("os.fsync") as fsync:
+                    storage.save()
+                    storage.save()
+                    self.assertEqual(fsync.call_count, calls)
+            FileStorage._FileStorage__fsync_timer.cancel()
+            FileStorage._FileStorage__fsync_timer = None
+            FileStorage._FileStorage__fsync_interval = 0.05
+            with mock.patch("os.fsync") as fsync:
+                storage.save()
+                self.assertEqual(fsync.call_count, 0)
+                time.sleep(0.2)
+                self.assertEqual(fsync.call_count, 2)
+        finally:
+            FileStorage._FileStorage__fsync = "always"
+            FileStorage._FileStorage__fsync_interval = 1.0
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_empty_file(self):
+        """Test that an empty file reloads as an empty storage"""
+        storage = FileStorage()
+        open("file.json", "w").close()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(storage.count(), 0)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_merges_other_process_writes(self):
+        """Test that save keeps the objects saved by another process"""
+        import subprocess
+        import sys
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="Maine")
+        storage.new(state)
+        storage.save()
+        generation = storage._FileStorage__generation()
+        other_id = subprocess.check_output(
+            [sys.executable, "-c", "from models.state import State; "
+             "s = State(name='Vermont'); s.save(); print(s.id)"],
+            universal_newlines=True).strip()
+        self.assertEqual(storage._FileStorage__generation(), generation + 1)
+        state.name = "New Maine"
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["State." + state.id]["name"], "New Maine")
+        self.assertEqual(js["State." + other_id]["name"], "Vermont")
+        self.assertEqual(storage.get(State, other_id).name, "Vermont")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_follows_other_process_writes(self):
+        """Test that each reload takes the latest writes of another process
+        and that save does not write the reloaded objects back"""
+        import subprocess
+        import sys
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="Maine")
+        storage.new(state)
+        storage.save()
+        script = "from models import storage; from models.state import " \
+            "State; s = storage.get(State, '{}'); s.name = '{}'; s.save()"
+        for name in ("q1", "q2"):
+            subprocess.check_call([sys.executable, "-c",
+                                   script.format(state.id, name)])
+            storage.close()
+            self.assertEqual(storage.get(State, state.id).name, name)
+        storage.new(State(name="Vermont"))
+        storage.save()
+        name = subprocess.check_output(
+            [sys.executable, "-c", "from models import storage; from "
+             "models.state import State; print(storage.get(State, '{}')"
+             ".name)".format(state.id)], universal_newlines=True).strip()
+        self.assertEqual(name, "q2")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_other_thread_reads(self):
+        """Test that threads reading during a reload do not see it half
+        done"""
+        import subprocess
+        import sys
+        import threading
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        states = [State(name=str(i)) for i in range(5000)]
+        storage.bulk_new(states)
+        storage.save()
+        subprocess.check_call([sys.executable, "-c",
+                               "from models import storage; from "
+                               "models.state import State; storage.bulk_new("
+                               "[State() for i in range(1000)]); "
+                               "storage.bulk_save()"])
+        done = threading.Event()
+        errors = []
+
+        def read():
+            """Gets a state until the reload is over"""
+            try:
+                while not done.is_set():
+                    if storage.get(State, states[0].id) is None:
+                        errors.append("missing")
+            except Exception as e:
+                errors.append(e)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            thread = threading.Thread(target=read)
+            thread.start()
+            storage.close()
+            done.set()
+            thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(storage.count(State), 6000)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_reload(self):
+        """Test that lazy mode only builds the objects that are reached"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="Idaho")
+        cities = [City(state_id=state.id), City(state_id=state.id), City()]
+        for obj in [state] + cities:
+            storage.new(obj)
+        storage.save()
+        FileStorage._FileStorage__lazy = True
+        try:
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            objects = FileStorage._FileStorage__objects
+            self.assertEqual(storage.count(City), 3)
+            self.assertEqual(storage.count(), 4)
+            self.assertEqual(len(objects), 0)
+            self.assertEqual(storage.get(State, state.id).name, "Idaho")
+            self.assertEqual(len(objects), 1)
+            ids = {city.id for city in storage.get(State, state.id).cities}
+            self.assertEqual(ids, {cities[0].id, cities[1].id})
+            self.assertEqual(len(objects), 3)
+            storage.compact()
+            with open("file.json", "r") as f:
+                self.assertEqual(len(json.load(f)), 4)
+            self.assertEqual(len(storage.all(City)), 3)
+            self.assertEqual(len(storage.all()), 4)
+        finally:
+            FileStorage._FileStorage__lazy = False
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_reload_keeps_built_objects(self):
+        """Test that a lazy reload does not record the objects built before
+        it as deleted"""
+        import subprocess
+        import sys
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="keepme")
+        storage.new(state)
+        storage.save()
+        FileStorage._FileStorage__lazy = True
+        FileStorage._FileStorage__journal = True
+        env = dict(os.environ, HBNB_FILE_LAZY="1", HBNB_FILE_JOURNAL="1")
+        try:
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "keepme")
+            subprocess.check_call([sys.executable, "-c",
+                                   "from models.state import State; "
+                                   "State(name='Vermont').save()"], env=env)
+            storage.close()
+            storage.new(State(name="Maine"))
+            storage.save()
+            names = subprocess.check_output(
+                [sys.executable, "-c", "from models import storage; "
+                 "print(sorted(s.name for s in storage.all('State')"
+                 ".values()))"], env=env, universal_newlines=True).strip()
+            self.assertEqual(names, "['Maine', 'Vermont', 'keepme']")
+        finally:
+            FileStorage._FileStorage__lazy = False
+            FileStorage._FileStorage__journal = False
+            storage.compact()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_reload_threads(self):
+        """Test that threads using the storage during a deferred reload
+        wait for all of it"""
+        import threading
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.bulk_new([State(name=str(i)) for i in range(20000)])
+        storage.save()
+        FileStorage._FileStorage__lazy = True
+        try:
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            counts = []
+            threads = [threading.Thread(
+                target=lambda: counts.append(storage.count(State)))
+                for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(counts, [20000] * 4)
+        finally:
+            FileStorage._FileStorage__lazy = False
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_pickle_format(self):
+        """Test that the storage saves and reloads in the pickle format"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__format = "pickle"
+        FileStorage._FileStorage__file_path = "file.pickle"
+        try:
+            state = State(name="Florida")
+            storage.new(state)
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            reloaded = storage.get(State, state.id)
+            self.assertEqual(reloaded.name, "Florida")
+            self.assertEqual(reloaded.created_at, state.created_at)
+        finally:
+            FileStorage._FileStorage__format = "json"
+            FileStorage._FileStorage__file_path = "file.json"
+            for name in os.listdir("."):
+                if name.startswith("file.pickle"):
+                    os.remove(name)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_get_many(self):
+        """Test that get_many returns the objects found in the ids order"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        states = [State(), State()]
+        for state in states:
+            storage.new(state)
+        self.assertEqual(storage.get_many(State, [states[1].id, "nope",
+                                                  states[0].id, None]),
+                         [states[1], states[0]])
+        self.assertEqual(storage.get_many(City, [states[0].id]), [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_iter_all(self):
+        """Test that iter_all yields the pairs all returns"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        for value in classes.values():
+            storage.new(value())
+        self.assertEqual(dict(storage.iter_all()), storage.all())
+        self.assertEqual(dict(storage.iter_all(State)), storage.all(State))
+        self.assertEqual(list(storage.iter_all("Nope")), [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk_save(self):
+        """Test that bulk_new and bulk_save store objects with one write"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.save()
+        states = [State(name=str(i)) for i in range(5)]
+        storage.bulk_new(states)
+        self.assertEqual(storage.all(State),
+                         {"State." + state.id: state for state in states})
+        storage.bulk_save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(set(js), {"State." + state.id for state in states})
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction(self):
+        """Test that a transaction saves once at its end"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.save()
+        with storage.transaction():
+            state = State(name="California")
+            state.save()
+            City(name="Fresno", state_id=state.id).save()
+            self.assertFalse(os.path.getsize("file.json") > 2)
+        with open("file.json", "r") as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction_rollback(self):
+        """Test that a transaction raising puts the objects back"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        state = State(name="California")
+        city = City(name="Fresno", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        storage.save()
+        with self.assertRaises(ValueError):
+            with storage.transaction():
+                state.name = "Nevada"
+                city.state_id = "other"
+                city.population = 1
+                storage.new(State())
+                storage.delete(city)
+                storage.save()
+                raise ValueError
+        self.assertEqual(state.name, "California")
+        self.assertEqual(city.state_id, state.id)
+        self.assertFalse(hasattr(city, "population"))
+        self.assertEqual(storage.all(), {"State." + state.id: state,
+                                         "City." + city.id: city})
+        self.assertEqual(storage.lookup(City, "state_id", state.id), [city])
+        with open("file.json", "r") as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "California")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction_other_thread(self):
+        """Test that a transaction raising does not put back the objects
+        saved by another thread meanwhile"""
+        import threading
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        storage.save()
+        started = threading.Event()
+        saved = []
+
+        def other():
+            """Saves a state while the transaction is running"""
+            started.wait()
+            state = State(name="Nevada")
+            state.save()
+            saved.append(state)
+        thread = threading.Thread(target=other)
+        thread.start()
+        with self.assertRaises(ValueError):
+            with storage.transaction():
+                State(name="California").save()
+                started.set()
+                thread.join(0.2)
+                raise ValueError
+        thread.join()
+        self.assertEqual([state.name for state
+                          in storage.all(State).values()], ["Nevada"])
+        with open("file.json", "r") as f:
+            self.assertEqual(list(json.load(f)),
+                             ["State." + saved[0].id])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_page(self):
+        """Test that page returns the objects after an id in id order"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        states = [State() for i in range(5)]
+        for state in states:
+            storage.new(state)
+        states.sort(key=lambda state: state.id)
+        self.assertEqual(storage.page(State, 2), states[:2])
+        self.assertEqual(storage.page(State, 2, states[1].id), states[2:4])
+        self.assertEqual(storage.page(State, None, states[3].id),
+                         states[4:])
+        storage.delete(states[2])
+        new = State(id=states[1].id + "0")
+        storage.new(new)
+        self.assertEqual(storage.page(State, 3, states[0].id),
+                         [states[1], new, states[3]])
+        cities = sorted([City(state_id=states[0].id) for i in range(3)],
+                        key=lambda city: city.id)
+        for city in cities:
+            storage.new(city)
+        storage.new(City(state_id=states[1].id))
+        self.assertEqual(storage.page(City, 2, None, "state_id",
+                                      states[0].id), cities[:2])
+        self.assertEqual(storage.page(City, 2, cities[1].id, "state_id",
+                                      states[0].id), cities[2:])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lookup_bitmap(self):
+        """Test that the bitmaps follow the foreign keys of the objects"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        places = [Place(amenity_ids=["a", "b"]), Place(amenity_ids=["a"])]
+        for place in places:
+            storage.new(place)
+
+        def found(amenity_id):
+            """Returns the indexes of the places having amenity_id"""
+            bitmap = storage.lookup_bitmap(Place, "amenity_ids", amenity_id)
+            return sorted(places.index(place) for place
+                          in storage.bitmap_objects(Place, bitmap))
+        self.assertEqual(found("a"), [0, 1])
+        self.assertEqual(found("b"), [0])
+        self.assertEqual(found("c"), [])
+        places[1].amenity_ids = ["b", "c"]
+        places.append(Place(amenity_ids=["c"]))
+        storage.new(places[2])
+        storage.delete(places[0])
+        self.assertEqual(found("a"), [])
+        self.assertEqual(found("b"), [1])
+        self.assertEqual(found("c"), [1, 2])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_range_bitmap(self):
+        """Test the ranges and the order of the columns of the objects"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        places = [Place(price_by_night=price) for price in (30, 10, 20)]
+        for place in places:
+            storage.new(place)
+
+        def found(low, high):
+            """Returns the indexes of the places in the price range"""
+            bitmap = storage.range_bitmap(Place, "price_by_night", low, high)
+            return sorted(places.index(place) for place
+                          in storage.bitmap_objects(Place, bitmap))
+
+        def ordered(reverse=False):
+            """Returns the indexes of the places in the order of prices"""
+            return [places.index(place) for place in storage.iter_sorted(
+                Place, "price_by_night", reverse)]
+        self.assertEqual(found(10, 20), [1, 2])
+        self.assertEqual(found(None, 15), [1])
+        self.assertEqual(found(25, None), [0])
+        self.assertEqual(ordered(), [1, 2, 0])
+        self.assertEqual(ordered(True), [0, 2, 1])
+        places[0].price_by_night = 5
+        places.append(Place(price_by_night=20))
+        storage.new(places[3])
+        storage.delete(places[2])
+        self.assertEqual(found(10, 20), [1, 3])
+        self.assertEqual(found(None, 15), [0, 1])
+        self.assertEqual(ordered(), [0, 1, 3])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_box_bitmap(self):
+        """Test the boxes and the distances of the points of the objects"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        places = [Place(latitude=lat, longitude=lon) for lat, lon
+                  in ((37.77, -122.42), (37.80, -122.27), (0, 179.9))]
+        for place in places:
+            storage.new(place)
+        storage.new(Place(latitude=None, longitude=None))
+
+        def found(*box):
+            """Returns the indexes of the places in the box"""
+            bitmap = storage.box_bitmap(Place, *box)
+            return sorted(places.index(place) for place
+                          in storage.bitmap_objects(Place, bitmap))
+
+        def nearest(latitude, longitude):
+            """Returns the indexes of the places nearest first"""
+            return [places.index(place) for far, place
+                    in storage.iter_nearest(Place, latitude, longitude)]
+        self.assertEqual(found(37, -123, 38, -122), [0, 1])
+        self.assertEqual(found(-1, 179, 1, -179), [2])
+        self.assertEqual(found(-90, -180, 90, 180), [0, 1, 2])
+        self.assertEqual(nearest(37.79, -122.3), [1, 0, 2])
+        self.assertEqual(nearest(0, -179.9), [2, 0, 1])
+        places[1].longitude = -122.5
+        places.append(Place(latitude=37.76, longitude=-122.43))
+        storage.new(places[3])
+        storage.delete(places[0])
+        self.assertEqual(found(37, -123, 38, -122.4), [1, 3])
+        self.assertEqual(nearest(37.79, -122.3), [3, 1, 2])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_text_search(self):
+        """Test that the full-text index follows the places and reviews"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        places = [Place(name="Cozy cottage"), Place(name="City loft")]
+        review = Review(place_id=places[1].id, text="Cozy and quiet")
+        for obj in places + [review]:
+            storage.new(obj)
+
+        def found(query):
+            """Returns the indexes of the places found, best first"""
+            return [places.index(place) for score, place
+                    in storage.text_search(Place, query)]
+        self.assertEqual(found("cozy"), [0, 1])
+        self.assertEqual(found("quiet"), [1])
+        review.place_id = places[0].id
+        self.assertEqual(found("quiet"), [0])
+        places[1].name = "Quiet loft"
+        self.assertEqual(found("quiet"), [1, 0])
+        storage.delete(review)
+        self.assertEqual(found("quiet"), [1])
+        self.assertEqual(found("cozy"), [0])
+        storage.delete(places[1])
+        self.assertEqual(found("loft"), [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_prefix_search(self):
+        """Test the names starting with a prefix, whatever their case"""
+        storage = FileStorage()
+        FileStorage._FileStorage__objects = {}
+        states = [State(name=name) for name in ("Oregon", "ohio", "Utah")]
+        for state in states:
+            storage.new(state)
+
+        def found(prefix, limit=None):
+            """Returns the indexes of the states starting with prefix"""
+            return [states.index(state) for state
+                    in storage.prefix_search(State, "name", prefix, limit)]
+        self.assertEqual(found("O"), [1, 0])
+        self.assertEqual(found("o", 1), [1])
+        self.assertEqual(found("OR"), [0])
+        self.assertEqual(found("x"), [])
+        self.assertEqual(found(""), [1, 0, 2])
+        states[2].name = "Oklahoma"
+        storage.delete(states[1])
+        self.assertEqual(found("o"), [2, 0])
+        self.assertEqual(found("u"), [])
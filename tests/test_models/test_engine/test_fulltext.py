@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Contains the TestFulltextDocs and TestTextIndex classes
+"""
+
+import inspect
+from models.engine import fulltext
+from models.engine.fulltext import TextIndex
+import pep8
+import unittest
+
+
+class TestFulltextDocs(unittest.TestCase):
+    """Tests to check the documentation and style of fulltext"""
+    def test_pep8_conformance_fulltext(self):
+        """Test that models/engine/fulltext.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/fulltext.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_fulltext(self):
+        """Test tests/test_models/test_fulltext.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_fulltext.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_fulltext_module_docstring(self):
+        """Test for the fulltext.py module docstring"""
+        self.assertIsNot(fulltext.__doc__, None,
+                         "fulltext.py needs a docstring")
+        self.assertTrue(len(fulltext.__doc__) >= 1,
+                        "fulltext.py needs a docstring")
+
+    def test_fulltext_func_docstrings(self):
+        """Test for the presence of docstrings in fulltext"""
+        members = inspect.getmembers(fulltext, inspect.isfunction)
+        members += inspect.getmembers(TextIndex, inspect.isfunction)
+        for func in members:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestTextIndex(unittest.TestCase):
+    """Test the inverted index and its scores"""
+    def setUp(self):
+        """Indexes a few documents"""
+        self.index = TextIndex()
+        self.index.add("a", ["Cozy cottage", "A quiet, cozy place"])
+        self.index.add("b", ["Loft in the city", None])
+        self.index.add("c", ["Cottage with a pool and a garden"])
+
+    def test_tokenize(self):
+        """Test that the words are lowercase, without stopwords"""
+        self.assertEqual(fulltext.tokenize("The Cozy-cottage, in 2 d."),
+                         ["cozy", "cottage", "2", "d"])
+
+    def test_search(self):
+        """Test that the documents are ranked by their BM25 scores"""
+        self.assertEqual([doc for score, doc
+                          in self.index.search("cozy cottage")], ["a", "c"])
+        self.assertEqual([doc for score, doc
+                          in self.index.search("cottage pool")], ["c", "a"])
+        self.assertEqual(self.index.search("nothing"), [])
+        self.assertEqual(self.index.search("the"), [])
+        self.assertEqual([doc for score, doc in self.index.search(
+            "cottage", accept=lambda doc: doc != "c")], ["a"])
+
+    def test_update(self):
+        """Test that documents are replaced and removed"""
+        self.index.add("b", ["Cozy loft"])
+        self.index.remove("a")
+        self.index.remove("d")
+        self.assertEqual([doc for score, doc in self.index.search("cozy")],
+                         ["b"])
+        self.assertNotIn("quiet", self.index.postings)
+        self.assertEqual(self.index.total, 6)
+
+    def test_limit(self):
+        """Test that the limit best documents are the ones of a full
+        search"""
+        for i in range(50):
+            self.index.add(str(i), ["pool"] * (i % 7) + ["cottage"] * i)
+        for query in ("pool", "cottage pool garden", "cozy pool"):
+            for limit in (1, 3, 10):
+                self.assertEqual(self.index.search(query, limit),
+                                 self.index.search(query)[:limit])
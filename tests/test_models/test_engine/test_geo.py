@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Contains the TestGeoDocs and TestGeo classes
+"""
+
+import inspect
+from models.engine import geo
+import pep8
+import unittest
+
+
+class TestGeoDocs(unittest.TestCase):
+    """Tests to check the documentation and style of geo"""
+    def test_pep8_conformance_geo(self):
+        """Test that models/engine/geo.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_geo(self):
+        """Test tests/test_models/test_geo.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_geo.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_geo_module_docstring(self):
+        """Test for the geo.py module docstring"""
+        self.assertIsNot(geo.__doc__, None,
+                         "geo.py needs a docstring")
+        self.assertTrue(len(geo.__doc__) >= 1,
+                        "geo.py needs a docstring")
+
+    def test_geo_func_docstrings(self):
+        """Test for the presence of docstrings in geo"""
+        for func in inspect.getmembers(geo, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+    def test_grid_docstrings(self):
+        """Test for the presence of docstrings in Grid"""
+        self.assertTrue(len(geo.Grid.__doc__) >= 1,
+                        "Grid needs a docstring")
+        for func in inspect.getmembers(geo.Grid, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestGeo(unittest.TestCase):
+    """Test the distances and the boxes"""
+    def test_distance(self):
+        """Test the distances between points"""
+        self.assertEqual(geo.distance(37.7, -122.4, 37.7, -122.4), 0)
+        self.assertAlmostEqual(geo.distance(0, 0, 0, 1), 111.19, 2)
+        self.assertAlmostEqual(geo.distance(0, 179.5, 0, -179.5), 111.19, 2)
+        self.assertAlmostEqual(geo.distance(90, 0, -90, 0),
+                               geo.earth_radius * 3.141592653589793)
+
+    def test_bounding_box(self):
+        """Test that the box holds the points at most radius away"""
+        south, west, north, east = geo.bounding_box(0, 0, 111.19)
+        self.assertAlmostEqual(south, -1, 3)
+        self.assertAlmostEqual(east, 1, 3)
+        south, west, north, east = geo.bounding_box(0, 179.5, 111.19)
+        self.assertGreater(west, east)
+        self.assertTrue(geo.in_box(0, -179.7, south, west, north, east))
+        self.assertFalse(geo.in_box(0, 178, south, west, north, east))
+        self.assertEqual(geo.bounding_box(89.5, 0, 111.19)[1:4:2],
+                         (-180, 180))
+
+    def test_valid_point(self):
+        """Test that only the numbers of a point are valid"""
+        self.assertTrue(geo.valid_point(-90, 180.0))
+        self.assertFalse(geo.valid_point(91, 0))
+        self.assertFalse(geo.valid_point(0, None))
+        self.assertFalse(geo.valid_point(True, 0))
+
+    def test_grid(self):
+        """Test the boxes and the nearest points of a grid"""
+        grid = geo.Grid()
+        grid.add("a", 0, 0)
+        grid.add("b", 0, 1)
+        grid.add("c", 0, 179.9)
+        grid.add("d", 0, -179.9)
+        self.assertEqual(sorted(grid.box(-0.5, -0.5, 0.5, 1.5)), ["a", "b"])
+        self.assertEqual(sorted(grid.box(-1, 179, 1, -179)), ["c", "d"])
+        self.assertEqual([doc for far, doc in grid.nearest(0, 0.9)],
+                         ["b", "a", "c", "d"])
+        self.assertEqual([doc for far, doc in grid.nearest(
+            0, 179.95, lambda doc: doc != "c")], ["d", "b", "a"])
+        grid.add("a", 0, 2)
+        grid.remove("b")
+        self.assertEqual([doc for far, doc in grid.nearest(0, 0)],
+                         ["a", "c", "d"])
@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""
+Contains the TestSearchDocs and TestSearch classes
+"""
+
+import inspect
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.engine import search
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import pep8
+import unittest
+
+
+class TestSearchDocs(unittest.TestCase):
+    """Tests to check the documentation and style of search"""
+    def test_pep8_conformance_search(self):
+        """Test that models/engine/search.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/search.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_search(self):
+        """Test tests/test_models/test_search.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_search.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_search_module_docstring(self):
+        """Test for the search.py module docstring"""
+        self.assertIsNot(search.__doc__, None,
+                         "search.py needs a docstring")
+        self.assertTrue(len(search.__doc__) >= 1,
+                        "search.py needs a docstring")
+
+    def test_search_func_docstrings(self):
+        """Test for the presence of docstrings in search"""
+        for func in inspect.getmembers(search, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestSearch(unittest.TestCase):
+    """Test the search of the places"""
+    def setUp(self):
+        """Stores a state, cities, amenities and places to search"""
+        if models.storage_t != 'db':
+            from models.engine.file_storage import FileStorage
+            FileStorage._FileStorage__objects = {}
+        storage = models.storage
+        self.user = User(email="a@b.c", password="pwd")
+        self.state = State(name="California")
+        self.cities = [City(name="Fresno", state_id=self.state.id),
+                       City(name="Reno", state_id=State(name="Nevada").id)]
+        self.amenities = [Amenity(name="Wifi"), Amenity(name="Pool")]
+        self.places = []
+        for city, amenities in [(0, [0, 1]), (0, [0]), (1, [0, 1])]:
+            place = Place(name="Place", city_id=self.cities[city].id,
+                          user_id=self.user.id)
+            if models.storage_t == 'db':
+                place.amenities = [self.amenities[i] for i in amenities]
+            else:
+                place.amenity_ids = [self.amenities[i].id
+                                     for i in amenities]
+            self.places.append(place)
+        for obj in [self.user, self.state] + self.cities + self.amenities + \
+                self.places:
+            storage.new(obj)
+        if models.storage_t == 'db':
+            storage.new(State(id=self.cities[1].state_id, name="Nevada"))
+        storage.save()
+
+    def search(self, states=(), cities=(), amenities=(), ranges=None,
+               sort=None, limit=None, box=None, near=None, q=None):
+        """Returns the indexes in self.places of the places found"""
+        return [self.places.index(place) for place in search.search_places(
+            [self.state.id for i in states],
+            [self.cities[i].id for i in cities],
+            [self.amenities[i].id for i in amenities], ranges, sort, limit,
+            box, near, q)
+            if place in self.places]
+
+    def sorted(self, indexes):
+        """Returns the indexes in the order of the ids of their places"""
+        return sorted(indexes, key=lambda i: self.places[i].id)
+
+    def test_states_and_cities(self):
+        """Test that the places of the states and of the cities are found"""
+        self.assertEqual(self.search(states=[0]), self.sorted([0, 1]))
+        self.assertEqual(self.search(cities=[1]), [2])
+        self.assertEqual(self.search(states=[0], cities=[1, 0]),
+                         self.sorted([0, 1, 2]))
+
+    def test_amenities(self):
+        """Test that the places found have every amenity"""
+        self.assertEqual(self.search(amenities=[0, 1]), self.sorted([0, 2]))
+        self.assertEqual(self.search(amenities=[0]), self.sorted([0, 1, 2]))
+        self.assertEqual(self.search(states=[0], amenities=[1, 0]), [0])
+        self.assertEqual(self.search(cities=[1], amenities=[1]), [2])
+
+    def test_no_filter(self):
+        """Test that every place is found without filters"""
+        self.assertEqual(self.search(), self.sorted([0, 1, 2]))
+
+    def test_unlinked_amenity(self):
+        """Test that a place unlinked from an amenity is no longer found"""
+        self.assertEqual(self.search(amenities=[0, 1]), self.sorted([0, 2]))
+        if models.storage_t == 'db':
+            self.places[0].amenities = [self.amenities[0]]
+        else:
+            self.places[0].amenity_ids = [self.amenities[0].id]
+        models.storage.save()
+        self.assertEqual(self.search(amenities=[0, 1]), [2])
+        self.assertEqual(self.search(amenities=[0]), self.sorted([0, 1, 2]))
+
+    def test_ranges_and_sort(self):
+        """Test that the places are filtered and sorted by their prices"""
+        for place, price in zip(self.places, (30, 10, 20)):
+            place.price_by_night = price
+        models.storage.save()
+        price = {"price_by_night": (15, None)}
+        self.assertEqual(self.search(ranges=price), self.sorted([0, 2]))
+        self.assertEqual(self.search(amenities=[1], ranges=price,
+                                     sort="price_by_night"), [2, 0])
+        self.assertEqual(self.search(sort="-price_by_night"), [0, 2, 1])
+        self.assertEqual(self.search(ranges={"price_by_night": (10, None)},
+                                     sort="price_by_night", limit=2), [1, 2])
+        self.places[1].price_by_night = 40
+        models.storage.save()
+        self.assertEqual(self.search(ranges=price, sort="price_by_night"),
+                         [2, 0, 1])
+
+    def test_box_and_near(self):
+        """Test that the places are filtered and sorted by their points"""
+        for place, point in zip(self.places, ((36.74, -119.79),
+                                              (36.70, -119.60),
+                                              (39.53, -119.81))):
+            place.latitude, place.longitude = point
+            place.price_by_night = 10 * len(self.places[0].name)
+        models.storage.save()
+        self.assertEqual(self.search(box=(36, -120, 37, -119)),
+                         self.sorted([0, 1]))
+        self.assertEqual(self.search(near=(36.73, -119.7, None)), [0, 1, 2])
+        self.assertEqual(self.search(near=(39.5, -119.8, 50)), [2])
+        self.assertEqual(self.search(amenities=[1],
+                                     near=(36.7, -119.6, None)), [0, 2])
+        self.assertEqual(self.search(near=(36.7, -119.6, 100),
+                                     sort="price_by_night"),
+                         self.sorted([0, 1]))
+        self.places[2].latitude = 36.71
+        self.places[2].longitude = -119.65
+        models.storage.save()
+        self.assertEqual(self.search(near=(36.7, -119.6, 10)), [1, 2])
+
+    def test_no_point(self):
+        """Test that the places without a point are not found by points"""
+        self.places[0].latitude, self.places[0].longitude = 0.6, 0.6
+        models.storage.save()
+        self.assertEqual(self.search(box=(-1, -1, 1, 1)), [0])
+        self.assertEqual(self.search(near=(0.5, 0.5, None)), [0])
+
+    def test_keywords(self):
+        """Test that the places are found and ranked by their keywords"""
+        self.places[0].name = "Cozy cottage"
+        self.places[1].description = "A cozy loft with a pool xyzzy"
+        self.places[2].name = "Quiet cottage xyzzy"
+        models.storage.save()
+        review = Review(place_id=self.places[2].id, user_id=self.user.id,
+                        text="Cozy and quiet, xyzzy")
+        models.storage.new(review)
+        models.storage.save()
+        self.assertEqual(self.search(q="xyzzy quiet"), [2, 1])
+        self.assertEqual(self.search(q="xyzzy", limit=1), [2])
+        self.assertEqual(self.search(cities=[0], q="xyzzy cozy"), [1, 0])
+        self.assertEqual(self.search(q="pool xyzzy",
+                                     sort="-price_by_night"),
+                         self.sorted([1, 2])[::-1])
+        models.storage.delete(review)
+        models.storage.save()
+        self.assertEqual(self.search(q="quiet"), [2])
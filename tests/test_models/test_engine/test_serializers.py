@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""
+Contains the TestSerializersDocs and TestSerializers classes
+"""
+
+from datetime import datetime
+import importlib.util
+import inspect
+import io
+import json
+import os
+import pep8
+import tempfile
+import unittest
+from models.engine import serializers
+
+
+class TestSerializersDocs(unittest.TestCase):
+    """Tests to check the documentation and style of serializers"""
+    def test_pep8_conformance_serializers(self):
+        """Test that models/engine/serializers.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/serializers.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_serializers(self):
+        """Test tests/test_models/test_serializers.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_serializers.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_serializers_module_docstring(self):
+        """Test for the serializers.py module docstring"""
+        self.assertIsNot(serializers.__doc__, None,
+                         "serializers.py needs a docstring")
+        self.assertTrue(len(serializers.__doc__) >= 1,
+                        "serializers.py needs a docstring")
+
+    def test_serializers_func_docstrings(self):
+        """Test for the presence of docstrings in serializers"""
+        members = inspect.getmembers(serializers, inspect.isfunction)
+        for cls in serializers.serializers.values():
+            members += inspect.getmembers(type(cls), inspect.isfunction)
+        for func in members:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestSerializers(unittest.TestCase):
+    """Test the serializers and the converter"""
+    records = {"State.1": {"__class__": "State", "id": "1", "name": "a"},
+               "City.2": {"__class__": "City", "id": "2", "state_id": "1"}}
+
+    def test_iter_json_object(self):
+        """Test that the items streamed are the ones json.load returns"""
+        js = {"State.1": {"name": "a \"}{\" b", "n": 12, "x": [1.5, None]},
+              "Cité.2": {"text": "\\\\ \n", "ok": True},
+              "Place.3": {}}
+        text = json.dumps(js, indent=2)
+        for size in (1, 2, 3, 7, 1 << 16):
+            with self.subTest(size=size):
+                items = list(serializers.iter_json_object(io.StringIO(text),
+                                                          size))
+                self.assertEqual(items, list(js.items()))
+
+    def test_iter_json_object_empty_and_truncated(self):
+        """Test an empty object and a truncated file"""
+        self.assertEqual(list(serializers.iter_json_object(
+            io.StringIO(" {} "))), [])
+        with self.assertRaises(ValueError):
+            list(serializers.iter_json_object(
+                io.StringIO('{"a": {"b": 1}, "c": {"d"'), 4))
+
+    def test_round_trip(self):
+        """Test that every serializer loads back what it dumped"""
+        for name in ("json", "pickle"):
+            serializer = serializers.serializers[name]
+            with self.subTest(name=name):
+                f = io.BytesIO() if serializer.binary else io.StringIO()
+                serializer.dump(self.records, f)
+                f.seek(0)
+                self.assertEqual(dict(serializer.load(f)), self.records)
+
+    def test_pickle_dates(self):
+        """Test that pickle files hold the dates as datetime objects, which
+        the other formats write back as strings"""
+        records = {"State.1": {"__class__": "State", "id": "1",
+                               "created_at": "2017-03-25T02:17:06.000000",
+                               "updated_at": "2017-03-25T02:17:06.123456"}}
+        f = io.BytesIO()
+        serializers.serializers["pickle"].dump(records, f)
+        f.seek(0)
+        loaded = dict(serializers.serializers["pickle"].load(f))
+        self.assertEqual(loaded["State.1"]["created_at"],
+                         datetime(2017, 3, 25, 2, 17, 6))
+        self.assertEqual(records["State.1"]["created_at"],
+                         "2017-03-25T02:17:06.000000")
+        f = io.StringIO()
+        serializers.serializers["json"].dump(loaded, f)
+        self.assertEqual(json.loads(f.getvalue()), records)
+
+    @unittest.skipIf(importlib.util.find_spec("msgpack") is None,
+                     "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        """Test that msgpack loads back what it dumped"""
+        serializer = serializers.serializers["msgpack"]
+        f = io.BytesIO()
+        serializer.dump(self.records, f)
+        f.seek(0)
+        self.assertEqual(dict(serializer.load(f)), self.records)
+
+    def test_serializer_named(self):
+        """Test that the formats are found by name"""
+        self.assertIs(serializers.serializer_named("pickle"),
+                      serializers.serializers["pickle"])
+        with self.assertRaises(ValueError):
+            serializers.serializer_named("xml")
+
+    def test_pickle_batches(self):
+        """Test that pickle files with several batches load entirely"""
+        serializer = serializers.PickleSerializer()
+        serializer.batch = 3
+        records = {"State.{}".format(i): {"id": str(i)} for i in range(10)}
+        f = io.BytesIO()
+        serializer.dump(records, f)
+        f.seek(0)
+        self.assertEqual(dict(serializer.load(f)), records)
+
+    def test_convert(self):
+        """Test converting file.json to a pickle file and back"""
+        with tempfile.TemporaryDirectory() as folder:
+            src = os.path.join(folder, "file.json")
+            dst = os.path.join(folder, "file.pickle")
+            back = os.path.join(folder, "back.json")
+            with open(src, "w") as f:
+                json.dump(self.records, f)
+            self.assertEqual(serializers.convert(src, dst)[0], 2)
+            serializers.convert(dst, back)
+            with open(back, "r") as f:
+                self.assertEqual(json.load(f), self.records)
+            with self.assertRaises(ValueError):
+                serializers.convert(src, os.path.join(folder, "file.txt"))